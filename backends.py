@@ -0,0 +1,145 @@
+"""
+Pool of Ollama backends shared by every call site.
+
+OLLAMA_BACKENDS is a comma-separated list of base URLs (default
+http://localhost:11434). Each request goes to the backend with the fewest
+outstanding requests among those that are healthy and serve the requested
+model. A background task polls /api/tags every OLLAMA_HEALTH_INTERVAL seconds
+to refresh health and each backend's model list; a connection error ejects a
+backend immediately until the next successful check. Health checks use their
+own small client, so they never queue behind chat traffic for a pooled
+connection.
+"""
+import asyncio
+import itertools
+import logging
+import os
+from typing import List, Optional, Sequence, Set
+
+import httpx
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKEND_URLS = [u.strip().rstrip("/") for u in os.getenv("OLLAMA_BACKENDS", "http://localhost:11434").split(",") if u.strip()]
+HEALTH_INTERVAL_SECONDS = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_HEALTH_TIMEOUT", "2"))
+
+EJECTIONS = metrics.Counter("ollama_backend_ejections_total", "Backends marked unhealthy.", ["backend"])
+BACKEND_REQUESTS = metrics.Counter("ollama_backend_requests_total", "Requests sent to each backend.", ["backend"])
+
+
+class Backend:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.chat_url = f"{base_url}/api/chat"
+        self.healthy = True
+        self.outstanding = 0
+        # None until the first health check says which models are pulled.
+        self.models: Optional[Set[str]] = None
+
+    def serves(self, model: str) -> bool:
+        if self.models is None:
+            return True
+        return model in self.models or f"{model}:latest" in self.models
+
+    def __repr__(self) -> str:
+        return f"Backend({self.base_url!r}, healthy={self.healthy}, outstanding={self.outstanding})"
+
+
+class BackendPool:
+    def __init__(self, urls: Sequence[str]):
+        if not urls:
+            raise ValueError("at least one Ollama backend URL is required")
+        self.backends = [Backend(u) for u in urls]
+        self._tiebreak = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def pick(self, model: str, avoid: Sequence[Backend] = ()) -> Backend:
+        """
+        Least-outstanding backend, preferring healthy ones that serve `model`
+        and have not already failed this request. An ejected backend that has
+        the model beats a healthy one that would answer "model not found";
+        failing that, any backend is tried.
+        """
+        fresh = [b for b in self.backends if b not in avoid] or self.backends
+        candidates = (
+            [b for b in fresh if b.healthy and b.serves(model)]
+            or [b for b in fresh if b.serves(model)]
+            or fresh
+        )
+        # Rotate the start point so ties spread across backends.
+        offset = next(self._tiebreak) % len(candidates)
+        rotated = candidates[offset:] + candidates[:offset]
+        backend = min(rotated, key=lambda b: b.outstanding)
+        BACKEND_REQUESTS.inc(backend.base_url)
+        return backend
+
+    def mark_failed(self, backend: Backend) -> None:
+        if backend.healthy:
+            backend.healthy = False
+            EJECTIONS.inc(backend.base_url)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=len(self.backends)),
+                timeout=HEALTH_TIMEOUT_SECONDS,
+            )
+        return self._client
+
+    async def check(self) -> None:
+        client = self._get_client()
+
+        async def one(backend: Backend) -> None:
+            try:
+                r = await client.get(f"{backend.base_url}/api/tags")
+                r.raise_for_status()
+                backend.models = {m["name"] for m in r.json()["models"]}
+                backend.healthy = True
+            except Exception as e:
+                # Unreachable, or not answering like Ollama: either way, not usable.
+                logger.warning("health check failed for %s: %r", backend.base_url, e)
+                self.mark_failed(backend)
+
+        await asyncio.gather(*(one(b) for b in self.backends))
+
+    def start(self) -> None:
+        async def loop() -> None:
+            while True:
+                try:
+                    await self.check()
+                except Exception:
+                    logger.exception("backend health check round failed")
+                await asyncio.sleep(HEALTH_INTERVAL_SECONDS)
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_pool: Optional[BackendPool] = None
+
+
+def get_pool() -> BackendPool:
+    global _pool
+    if _pool is None:
+        _pool = BackendPool(BACKEND_URLS)
+    return _pool
+
+
+def configure(urls: List[str]) -> BackendPool:
+    """Replace the shared pool, e.g. to point benchmarks at fake servers."""
+    global _pool
+    _pool = BackendPool([u.rstrip("/") for u in urls])
+    return _pool
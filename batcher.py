@@ -0,0 +1,67 @@
+"""
+Micro-batching for async calls.
+
+Callers submit one item at a time; the batcher holds items until it has
+`max_items` of them or the oldest has waited `max_wait_ms`, then hands the
+whole list to `handler` and fans each result back to its caller.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+
+class MicroBatcher:
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]], max_items: int, max_wait_ms: float):
+        self.handler = handler
+        self.max_items = max(1, max_items)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        # Callers that were cancelled while waiting are dropped from the batch.
+        live = [(item, fut) for item, fut in batch if not fut.done()]
+        if not live:
+            return
+        self.batches += 1
+        self.items += len(live)
+        try:
+            results = await self.handler([item for item, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError(f"batch handler returned {len(results)} results for {len(live)} items")
+        except BaseException as e:
+            # Cancellation included: no caller may be left waiting on a batch that is gone.
+            for _, fut in live:
+                if not fut.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        fut.cancel()
+                    else:
+                        fut.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for (_, fut), result in zip(live, results):
+            if not fut.done():
+                fut.set_result(result)
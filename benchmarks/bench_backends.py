@@ -0,0 +1,106 @@
+"""
+Load balancing and failover across several fake Ollama backends.
+
+Starts three fakes with different latencies; the slowest one only has a model
+the bot does not use. Sends distinct LLM classifications with a fixed number
+in flight and reports how the pool spread them, then stops the fastest
+backend without telling the pool and runs the same load again to show
+requests retried onto the others. The response cache is off.
+
+Usage:
+    python -m benchmarks.bench_backends --requests 300 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+import backends
+import cache
+import classifier
+import ollama_client
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.stats import summarize
+
+# (port, latency ms, models served)
+BACKENDS = [
+    (11441, 100, ["mistral:latest"]),
+    (11442, 300, ["mistral:latest"]),
+    (11443, 50, ["llama3:latest"]),
+]
+
+
+async def run(total: int, concurrency: int, tag: str) -> dict:
+    latencies = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with sem:
+            started = time.perf_counter()
+            try:
+                await classifier.llm_classify(f"{tag} question #{i} for you.")
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["errors"] = errors
+    return result
+
+
+def report(label: str, result: dict, servers, before: dict) -> None:
+    print(f"{label}: {result['rps']:.1f} req/s  p50 {result['p50_ms']:.0f} ms  "
+          f"p99 {result['p99_ms']:.0f} ms  errors {result['errors']}")
+    for server in servers:
+        picked = backends.BACKEND_REQUESTS.values.get((server.base_url,), 0) - before.get((server.base_url,), 0)
+        print(f"  {server.base_url}  models={','.join(server.app.state.models)}  "
+              f"picked {picked:.0f}  served {server.calls}")
+
+
+async def scenario(servers, total: int, concurrency: int) -> None:
+    pool = backends.configure([s.base_url for s in servers])
+    await pool.check()
+
+    before = dict(backends.BACKEND_REQUESTS.values)
+    report("all healthy", await run(total, concurrency, "first"), servers, before)
+
+    # Stop the fastest backend while the pool still thinks it is healthy.
+    fastest = servers[0]
+    await asyncio.get_running_loop().run_in_executor(None, fastest.__exit__, None, None, None)
+    served = {s.base_url: s.calls for s in servers}
+    before = dict(backends.BACKEND_REQUESTS.values)
+    result = await run(total, concurrency, "second")
+    for s in servers:
+        s.app.state.calls -= served[s.base_url]
+    report(f"{fastest.base_url} down", result, servers, before)
+    ejections = sum(backends.EJECTIONS.values.values())
+    print(f"  ejections {ejections:.0f}, healthy: "
+          f"{', '.join(b.base_url for b in pool.backends if b.healthy)}")
+    await pool.stop()
+    await ollama_client.aclose()
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Load balancing and failover across Ollama backends.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    cache.CACHE_BACKEND = "off"
+    servers = [FakeOllamaServer(port, latency) for port, latency, _ in BACKENDS]
+    for server, (_, _, models) in zip(servers, BACKENDS):
+        server.app.state.models = models
+        server.__enter__()
+    try:
+        asyncio.run(scenario(servers, args.requests, args.concurrency))
+    finally:
+        for server in servers[1:]:
+            server.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main_cli()
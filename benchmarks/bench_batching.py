@@ -0,0 +1,96 @@
+"""
+Throughput versus added latency for the LLM classification micro-batcher.
+
+Sends distinct messages through the LLM classification tier at a fixed
+arrival rate against the fake Ollama, once per scheduler setting, with the
+response cache off and upstream capacity limited to --upstream-slots
+concurrent requests (a single inference box). Reports throughput, latency
+percentiles, upstream request count and average batch size. The last row
+makes the fake return unparseable batch output to exercise the per-item
+fallback.
+
+Usage:
+    python -m benchmarks.bench_batching --requests 200 --rate 100 --upstream-slots 4
+"""
+import argparse
+import asyncio
+import time
+
+import backends
+import cache
+import classifier
+import ollama_client
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.stats import summarize
+
+# (label, mode, max items, max wait ms); "fallback" gets unparseable batch output.
+SETTINGS = [
+    ("off", "off", 1, 0),
+    ("concurrent", "concurrent", 8, 25),
+    ("prompt", "prompt", 4, 10),
+    ("prompt", "prompt", 8, 25),
+    ("prompt", "prompt", 16, 50),
+    ("prompt", "prompt", 32, 100),
+    ("fallback", "prompt", 8, 25),
+]
+
+
+async def run(total: int, rate: float) -> dict:
+    latencies = []
+
+    async def one(i: int) -> None:
+        started = time.perf_counter()
+        await classifier.classify_with_llm(f"Quick question #{i} for you.")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(total):
+        tasks.append(asyncio.ensure_future(one(i)))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await ollama_client.aclose()
+    return summarize(latencies, elapsed)
+
+
+def configure(mode: str, max_items: int, max_wait_ms: float) -> None:
+    classifier.BATCH_MODE = mode
+    classifier.BATCH_MAX_ITEMS = max_items
+    classifier.BATCH_MAX_WAIT_MS = max_wait_ms
+    classifier._batcher = None
+    classifier._batch_semaphore = None
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Throughput vs latency for classification batching.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=100.0, help="arrivals per second")
+    parser.add_argument("--upstream-slots", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    args = parser.parse_args()
+
+    cache.CACHE_BACKEND = "off"
+    ollama_client.MAX_CONCURRENCY = args.upstream_slots
+    classifier.BATCH_CONCURRENCY = args.upstream_slots
+
+    print(f"{args.requests} messages at {args.rate:.0f}/s, {args.upstream_slots} upstream slots, "
+          f"{args.latency_ms:.0f} ms + {args.token_ms:.0f} ms/word upstream")
+    print(f"{'mode':<11}{'items':>6}{'wait':>6}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'upstream':>10}{'avg batch':>11}")
+    with FakeOllamaServer(args.ollama_port, args.latency_ms, args.token_ms) as ollama:
+        backends.configure([ollama.base_url])
+        for label, mode, max_items, max_wait_ms in SETTINGS:
+            ollama.app.state.malformed_batches = label == "fallback"
+            configure(mode, max_items, max_wait_ms)
+            before = ollama.calls
+            result = asyncio.run(run(args.requests, args.rate))
+            b = classifier._batcher
+            avg_batch = b.items / b.batches if b and b.batches else 1.0
+            print(f"{label:<11}{max_items:>6}{max_wait_ms:>6.0f}{result['rps']:>8.1f}{result['p50_ms']:>9.0f}"
+                  f"{result['p99_ms']:>9.0f}{ollama.calls - before:>10}{avg_batch:>11.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
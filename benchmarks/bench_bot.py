@@ -0,0 +1,86 @@
+"""
+Load benchmark for POST /bot against a local fake Ollama.
+
+Starts the fake Ollama and the FastAPI app on background threads, points the
+backend pool at the fake, then fires LLM-path messages (ones that miss
+the keyword rules and the local model) with a fixed number in flight and
+reports requests/sec and p50/p99 latency. Each request's message carries its
+index, so no two are coalesced into one upstream call. The response cache is
+off unless --cache is given.
+
+Usage:
+    python -m benchmarks.bench_bot --requests 400 --concurrency 64 --latency-ms 200
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import backends
+import cache
+import main
+from benchmarks.fake_ollama import BackgroundServer, FakeOllamaServer
+from benchmarks.stats import summarize
+
+# None of these trip the keyword rules or the local model, so each one costs
+# two Ollama calls; message_for makes every request distinct.
+MESSAGES = [
+    "I'm not sure where to start with my idea.",
+    "Can someone look over my plan before next week?",
+    "We keep missing deadlines and I don't know why.",
+    "Could you take a look at this?",
+]
+
+
+def message_for(i: int) -> str:
+    return f"{MESSAGES[i % len(MESSAGES)]} (request {i})"
+
+
+async def run_load(base_url: str, total: int, concurrency: int) -> dict:
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        async def one(i: int) -> None:
+            async with sem:
+                started = time.perf_counter()
+                r = await client.post("/bot", json={"message": message_for(i)})
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Load benchmark for POST /bot.")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--cache", action="store_true", help="leave the response cache on")
+    args = parser.parse_args()
+
+    if not args.cache:
+        cache.CACHE_BACKEND = "off"
+    with FakeOllamaServer(args.ollama_port, args.latency_ms) as ollama:
+        backends.configure([ollama.base_url])
+        with BackgroundServer(main.app, args.app_port) as app:
+            result = asyncio.run(run_load(app.base_url, args.requests, args.concurrency))
+
+    print(
+        f"{result['requests']} requests, concurrency {args.concurrency}, "
+        f"upstream latency {args.latency_ms:.0f} ms\n"
+        f"  throughput: {result['rps']:.1f} req/s   upstream calls: {ollama.calls}\n"
+        f"  p50: {result['p50_ms']:.1f} ms   p99: {result['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,42 @@
+"""
+Micro-benchmark for the compiled keyword classifier.
+
+Times classifier's compiled matcher against the original per-pattern
+re.search implementation on a random corpus built from every rule keyword,
+near-misses and filler text. Parity between the two is covered by
+tests/test_rule_parity.py.
+
+Usage:
+    python -m benchmarks.bench_classifier --messages 100000 --seed 0
+"""
+import argparse
+import time
+
+from classifier import _rule_classify
+from tests.test_rule_parity import generate_corpus, legacy_rule_based_classify
+
+
+def time_it(fn, corpus) -> float:
+    started = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    return time.perf_counter() - started
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for the keyword classifier.")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.messages, args.seed)
+
+    legacy_s = time_it(lambda t: (r := legacy_rule_based_classify(t)) and r.model_dump(), corpus)
+    compiled_s = time_it(_rule_classify, corpus)
+    per_msg = lambda s: s / len(corpus) * 1e6
+    print(f"legacy re.search loop:  {per_msg(legacy_s):6.2f} us/message")
+    print(f"compiled single pass:   {per_msg(compiled_s):6.2f} us/message  ({legacy_s / compiled_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,49 @@
+"""
+Latency and upstream call counts for a concurrent burst of identical /bot requests.
+
+Fires `--burst` identical LLM-path messages at once with the response cache
+off, so any deduplication comes from request coalescing, and prints how long
+the burst took and how many requests the fake Ollama actually received.
+Correctness of coalescing is covered by tests/test_coalesce.py.
+
+Usage:
+    python -m benchmarks.bench_coalesce --burst 50 --latency-ms 200
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import backends
+import cache
+import main
+from benchmarks.bench_bot import MESSAGES
+from benchmarks.fake_ollama import BackgroundServer, FakeOllamaServer
+
+
+async def burst(base_url: str, n: int) -> float:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client.post("/bot", json={"message": MESSAGES[0]}) for _ in range(n)))
+        return time.perf_counter() - started
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Request coalescing timing for identical /bot bursts.")
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--app-port", type=int, default=8765)
+    args = parser.parse_args()
+
+    cache.CACHE_BACKEND = "off"
+    with FakeOllamaServer(args.ollama_port, args.latency_ms) as ollama:
+        backends.configure([ollama.base_url])
+        with BackgroundServer(main.app, args.app_port) as app:
+            elapsed = asyncio.run(burst(app.base_url, args.burst))
+        print(f"{args.burst} identical /bot requests in {elapsed * 1000:.0f} ms -> {ollama.calls} upstream calls")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,232 @@
+"""
+Replay a JSONL corpus of messages against /bot and report latency by tier.
+
+The corpus is read one line at a time, so files of any size work. Each line
+is a JSON object; the message is taken from --field, or else the first of
+"message", "text" and "body" that is present. A "category" field, when
+present, becomes the fake Ollama's answer for that message.
+
+Targets:
+  inprocess  the FastAPI app through httpx's ASGI transport (default)
+  http       the app under uvicorn on --app-port, over loopback
+  --url      an already running server; no fake Ollama is started
+
+Load is either closed-loop (--concurrency requests in flight) or open-loop
+(--rate arrivals per second). The classification tier of each request is
+read from the Server-Timing header (llm_classify, then local_classify, else
+rules), so a --url server needs SERVER_TIMING=1 or every tier is "unknown".
+
+Throughput and p50/p95/p99 per tier, per category and per tier/category pair
+are printed and written as JSON to --output, so runs can be diffed.
+
+Usage:
+    python -m benchmarks.bench_replay --corpus data/classifier_eval.jsonl --repeat 20 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+# Must be set before main is imported; the middleware is registered at import.
+os.environ.setdefault("SERVER_TIMING", "1")
+
+import backends
+import cache
+import main
+from benchmarks.fake_ollama import BackgroundServer, FakeOllamaServer
+from benchmarks.stats import summarize
+
+MESSAGE_FIELDS = ("message", "text", "body")
+
+
+def read_corpus(path: str, field: Optional[str], repeat: int, limit: Optional[int]) -> Iterator[dict]:
+    """Yields {"message", "category"} per line, rereading the file `repeat` times."""
+    sent = 0
+    for _ in range(repeat):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                key = field or next((k for k in MESSAGE_FIELDS if k in row), None)
+                if key is None or not row.get(key):
+                    continue
+                yield {"message": row[key], "category": row.get("category")}
+                sent += 1
+                if limit is not None and sent >= limit:
+                    return
+
+
+def tier_from(server_timing: str) -> str:
+    stages = {part.split(";", 1)[0].strip() for part in server_timing.split(",")}
+    if "llm_classify" in stages:
+        return "llm"
+    if "local_classify" in stages:
+        return "local"
+    if "rule_based_classify" in stages:
+        return "rules"
+    return "unknown"
+
+
+class Results:
+    def __init__(self):
+        self.by_tier: Dict[str, List[float]] = defaultdict(list)
+        self.by_category: Dict[str, List[float]] = defaultdict(list)
+        self.by_pair: Dict[str, List[float]] = defaultdict(list)
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.mislabeled = 0
+
+    def add(self, latency: float, tier: str, category: str, expected: Optional[str]) -> None:
+        self.latencies.append(latency)
+        self.by_tier[tier].append(latency)
+        self.by_category[category].append(latency)
+        self.by_pair[f"{tier}/{category}"].append(latency)
+        if expected is not None and expected != category:
+            self.mislabeled += 1
+
+    def report(self, elapsed: float) -> dict:
+        def group(values: Dict[str, List[float]]) -> dict:
+            return {k: summarize(v, elapsed) for k, v in sorted(values.items())}
+
+        return {
+            "total": {**summarize(self.latencies, elapsed), "errors": self.errors, "elapsed_s": elapsed},
+            "tier_counts": {k: len(v) for k, v in sorted(self.by_tier.items())},
+            "mislabeled": self.mislabeled,
+            "by_tier": group(self.by_tier),
+            "by_category": group(self.by_category),
+            "by_tier_category": group(self.by_pair),
+        }
+
+
+async def replay(client: httpx.AsyncClient, corpus: Iterator[dict], concurrency: int,
+                 rate: Optional[float], results: Results, on_row=None) -> float:
+    async def one(row: dict) -> None:
+        started = time.perf_counter()
+        try:
+            r = await client.post("/bot", json={"message": row["message"]})
+            r.raise_for_status()
+        except httpx.HTTPError:
+            results.errors += 1
+            return
+        latency = time.perf_counter() - started
+        category = r.json()["classification"]["category"]
+        results.add(latency, tier_from(r.headers.get("server-timing", "")), category, row["category"])
+
+    def rows() -> Iterator[dict]:
+        for row in corpus:
+            if on_row is not None:
+                on_row(row)
+            yield row
+
+    started = time.perf_counter()
+    if rate:
+        # Open loop: arrivals keep their schedule however slow the replies are.
+        tasks = set()
+        for row in rows():
+            task = asyncio.ensure_future(one(row))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+    else:
+        # Closed loop: workers pull lines from the shared iterator as they finish.
+        source = rows()
+
+        async def worker() -> None:
+            for row in source:
+                await one(row)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict) -> None:
+    total = report["total"]
+    print(f"{total['requests']} requests in {total['elapsed_s']:.1f} s, {total['rps']:.1f} req/s, "
+          f"{total['errors']} errors, {report['mislabeled']} off-label")
+    print("tiers: " + ", ".join(f"{k} {v}" for k, v in report["tier_counts"].items()))
+    print(f"{'':<22}{'n':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for section in ("by_tier", "by_category", "by_tier_category"):
+        for name, s in report[section].items():
+            print(f"{name:<22}{s['requests']:>7}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Replay a JSONL corpus against /bot.")
+    parser.add_argument("--corpus", default="data/classifier_eval.jsonl")
+    parser.add_argument("--field", help="JSON field holding the message")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus")
+    parser.add_argument("--limit", type=int, help="stop after this many messages")
+    parser.add_argument("--target", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--url", help="replay against this running server instead")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, help="arrivals per second (open loop)")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--cache", action="store_true", help="leave the response cache on")
+    parser.add_argument("--output", default="replay_results.json")
+    args = parser.parse_args()
+
+    corpus = read_corpus(args.corpus, args.field, args.repeat, args.limit)
+    results = Results()
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async def run(client: httpx.AsyncClient, on_row=None) -> float:
+        async with client:
+            return await replay(client, corpus, args.concurrency, args.rate, results, on_row)
+
+    if args.url:
+        elapsed = asyncio.run(run(httpx.AsyncClient(base_url=args.url, limits=limits, timeout=300)))
+    else:
+        if not args.cache:
+            cache.CACHE_BACKEND = "off"
+        with FakeOllamaServer(args.ollama_port, args.latency_ms, args.token_ms) as ollama:
+            backends.configure([ollama.base_url])
+
+            def teach(row: dict) -> None:
+                if row["category"]:
+                    ollama.app.state.labels[row["message"]] = row["category"]
+
+            if args.target == "http":
+                with BackgroundServer(main.app, args.app_port) as app:
+                    client = httpx.AsyncClient(base_url=app.base_url, limits=limits, timeout=300)
+                    elapsed = asyncio.run(run(client, teach))
+            else:
+                transport = httpx.ASGITransport(app=main.app)
+                client = httpx.AsyncClient(transport=transport, base_url="http://app", timeout=300)
+                elapsed = asyncio.run(run(client, teach))
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        **results.report(elapsed),
+    }
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,142 @@
+"""
+Memory use and latency of multi-turn /bot sessions.
+
+Memory: builds --memory-sessions sessions of --memory-turns exchanges each,
+once with context compaction and once with the budget lifted so every turn is
+kept, and reports traced heap per session and the context each next turn
+would send.
+
+Latency: runs --sessions conversations of --turns turns all at once through
+the /bot handler in-process against the fake Ollama, once per session backend,
+plus a stateless baseline. Reports per-turn p50/p99, upstream calls and LLM
+classifications (later turns reuse the session's classification), and the
+microseconds per turn spent loading and saving the session. The response
+cache is off.
+
+Usage:
+    python -m benchmarks.bench_sessions --sessions 2000 --turns 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+import backends
+import cache
+import classifier
+import main
+import metrics
+import ollama_client
+import sessions
+from benchmarks.bench_bot import MESSAGES
+from benchmarks.fake_ollama import FakeOllamaServer, CANNED_REPLY
+from benchmarks.stats import percentile
+
+
+def build_sessions(n: int, turns: int) -> tuple:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = []
+    for i in range(n):
+        session = sessions.Session(f"s{i}")
+        for t in range(turns):
+            message = f"{MESSAGES[t % len(MESSAGES)]} This is turn {t} of conversation {i}."
+            session.record(message, CANNED_REPLY * 3, {"category": "business"})
+        built.append(session)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    context_tokens = sum(sessions.estimate_tokens(m["content"]) for m in built[-1].context())
+    return used / n, context_tokens
+
+
+def memory_report(n: int, turns: int) -> None:
+    print(f"memory: {n} sessions x {turns} exchanges")
+    budget = sessions.CONTEXT_TOKEN_BUDGET
+    for label, limit in (("compacted", budget), ("unbounded", 10**9)):
+        sessions.CONTEXT_TOKEN_BUDGET = limit
+        per_session, context_tokens = build_sessions(n, turns)
+        print(f"  {label:<10} {per_session / 1024:>7.1f} KiB/session   next turn context ~{context_tokens} tokens")
+    sessions.CONTEXT_TOKEN_BUDGET = budget
+
+
+async def converse(n: int, turns: int, stateful: bool) -> dict:
+    latencies = []
+    store_seconds = 0.0
+    ids = [(await sessions.create()).id if stateful else None for _ in range(n)]
+
+    async def conversation(i: int) -> None:
+        for t in range(turns):
+            message = f"{MESSAGES[t % len(MESSAGES)]} (conversation {i})"
+            req = main.ChatRequest(message=message, session_id=ids[i])
+            started = time.perf_counter()
+            await main.bot(req)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(n)))
+    elapsed = time.perf_counter() - started
+
+    # Session bookkeeping on its own, outside the upstream waits above.
+    if stateful:
+        t0 = time.perf_counter()
+        for session_id in ids:
+            session = await sessions.load(session_id)
+            session.context()
+            session.record("One more question.", CANNED_REPLY, session.classification)
+            await sessions.save(session)
+        store_seconds = time.perf_counter() - t0
+
+    await ollama_client.aclose()
+    return {
+        "elapsed": elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "store_us": store_seconds / n * 1e6,
+    }
+
+
+def latency_report(ollama, n: int, turns: int) -> None:
+    print(f"latency: {n} concurrent sessions x {turns} turns, "
+          f"{ollama_client.MAX_CONCURRENCY} upstream slots")
+    tmp = tempfile.mkdtemp()
+    runs = [
+        ("stateless", None),
+        ("memory", lambda: sessions.MemorySessionStore(max_sessions=n)),
+        ("sqlite", lambda: sessions.SQLiteSessionStore(os.path.join(tmp, "sessions.sqlite3"))),
+    ]
+    for label, make_store in runs:
+        sessions._store = make_store() if make_store else None
+        calls_before = ollama.calls
+        llm_before = sum(v for (tier, _), v in metrics.CLASSIFICATIONS.values.items() if tier == "llm")
+        result = asyncio.run(converse(n, turns, make_store is not None))
+        llm = sum(v for (tier, _), v in metrics.CLASSIFICATIONS.values.items() if tier == "llm") - llm_before
+        store = f"{result['store_us']:>7.0f} us/turn in store" if make_store else ""
+        print(f"  {label:<10} {result['elapsed']:>5.1f} s  p50 {result['p50_ms']:>6.0f} ms  p99 {result['p99_ms']:>6.0f} ms  "
+              f"upstream {ollama.calls - calls_before:>6}  llm classify {llm:>6.0f}  {store}")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Memory use and latency of multi-turn sessions.")
+    parser.add_argument("--memory-sessions", type=int, default=5000)
+    parser.add_argument("--memory-turns", type=int, default=40)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-slots", type=int, default=64)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    args = parser.parse_args()
+
+    memory_report(args.memory_sessions, args.memory_turns)
+
+    cache.CACHE_BACKEND = "off"
+    classifier.BATCH_MODE = "off"
+    ollama_client.MAX_CONCURRENCY = args.upstream_slots
+    with FakeOllamaServer(args.ollama_port, args.latency_ms) as ollama:
+        backends.configure([ollama.base_url])
+        latency_report(ollama, args.sessions, args.turns)
+
+
+if __name__ == "__main__":
+    main_cli()
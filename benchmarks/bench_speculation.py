@@ -0,0 +1,84 @@
+"""
+Latency of speculative classify-and-respond versus the serial path.
+
+Uses the held-out examples that fall through to the LLM classifier. The fake
+Ollama answers classifications with the true labels, so the speculation hit
+rate reflects how often the local model's best guess is right. Each message
+is sent `--rounds` times with the response cache off, once serially and once
+speculatively, and the script reports latency, hit rate and time saved or
+wasted.
+
+Usage:
+    python -m benchmarks.bench_speculation --rounds 5 --concurrency 4 --latency-ms 200
+"""
+import argparse
+import asyncio
+import time
+
+import backends
+import cache
+import classifier
+import local_classifier
+import ollama_client
+import speculation
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.stats import percentile
+from router import route
+
+
+async def serial(message: str) -> None:
+    classification = await classifier.classify_text(message)
+    await route(message, classification)
+
+
+async def run(fn, messages, concurrency: int) -> list:
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(message: str) -> None:
+        async with sem:
+            started = time.perf_counter()
+            await fn(message)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(m) for m in messages))
+    await ollama_client.aclose()
+    return latencies
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Speculative routing benchmark.")
+    parser.add_argument("--data", default="data/classifier_eval.jsonl")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    args = parser.parse_args()
+
+    cache.CACHE_BACKEND = "off"
+    examples = [(t, c) for t, c in local_classifier.read_examples(args.data) if classifier.classify_local(t) is None]
+    messages = [t for t, _ in examples] * args.rounds
+
+    with FakeOllamaServer(args.ollama_port, args.latency_ms) as ollama:
+        ollama.app.state.labels = dict(examples)
+        backends.configure([ollama.base_url])
+        serial_lat = asyncio.run(run(serial, messages, args.concurrency))
+        serial_calls = ollama.calls
+        spec_lat = asyncio.run(run(speculation.classify_and_route, messages, args.concurrency))
+        spec_calls = ollama.calls - serial_calls
+
+    outcomes = speculation.SPECULATIONS.values
+    hits, misses = outcomes.get(("hit",), 0), outcomes.get(("miss",), 0)
+    saved = speculation.SAVED_SECONDS.values.get((), [0])[-1]
+    wasted = speculation.WASTED_SECONDS.values.get((), [0])[-1]
+    print(f"{len(examples)} LLM-path messages x {args.rounds} rounds, concurrency {args.concurrency}")
+    print(f"serial       p50 {percentile(serial_lat, 50) * 1000:6.0f} ms  p99 {percentile(serial_lat, 99) * 1000:6.0f} ms"
+          f"  upstream calls {serial_calls}")
+    print(f"speculative  p50 {percentile(spec_lat, 50) * 1000:6.0f} ms  p99 {percentile(spec_lat, 99) * 1000:6.0f} ms"
+          f"  upstream calls {spec_calls}")
+    print(f"hit rate {hits / max(1, hits + misses):.0%} ({hits} hit, {misses} miss, "
+          f"{outcomes.get(('skipped',), 0)} skipped); saved {saved:.1f} s, wasted {wasted:.1f} s upstream")
+
+
+if __name__ == "__main__":
+    main_cli()
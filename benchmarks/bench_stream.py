@@ -0,0 +1,90 @@
+"""
+Time-to-first-token benchmark for POST /bot/stream versus POST /bot.
+
+Uses the same fake Ollama and LLM-path messages as bench_bot, with every
+request distinct so none are coalesced and the response cache off, and
+reports when the classification event, the first token and the final event
+arrive.
+
+Usage:
+    python -m benchmarks.bench_stream --requests 50 --concurrency 10 --latency-ms 200 --token-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+import backends
+import cache
+import main
+from benchmarks.bench_bot import message_for
+from benchmarks.fake_ollama import BackgroundServer, FakeOllamaServer
+from benchmarks.stats import percentile
+
+
+async def run(base_url: str, total: int, concurrency: int) -> dict:
+    timings = {"classification": [], "first_token": [], "done": [], "blocking": []}
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        async def streamed(message: str) -> None:
+            started = time.perf_counter()
+            async with client.stream("POST", "/bot/stream", json={"message": message}) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    event = json.loads(line)["type"]
+                    now = time.perf_counter() - started
+                    if event == "classification":
+                        timings["classification"].append(now)
+                    elif event == "token" and len(timings["first_token"]) < len(timings["classification"]):
+                        timings["first_token"].append(now)
+                    elif event in ("done", "error"):
+                        timings["done"].append(now)
+
+        async def blocking(message: str) -> None:
+            started = time.perf_counter()
+            r = await client.post("/bot", json={"message": message})
+            r.raise_for_status()
+            timings["blocking"].append(time.perf_counter() - started)
+
+        async def one(i: int) -> None:
+            async with sem:
+                await streamed(message_for(i))
+                await blocking(message_for(total + i))
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+
+    return timings
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Time-to-first-token benchmark for /bot/stream.")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--app-port", type=int, default=8765)
+    args = parser.parse_args()
+
+    cache.CACHE_BACKEND = "off"
+    with FakeOllamaServer(args.ollama_port, args.latency_ms, args.token_ms) as ollama:
+        backends.configure([ollama.base_url])
+        with BackgroundServer(main.app, args.app_port) as app:
+            timings = asyncio.run(run(app.base_url, args.requests, args.concurrency))
+
+    labels = {
+        "classification": "/bot/stream classification",
+        "first_token": "/bot/stream first token",
+        "done": "/bot/stream complete",
+        "blocking": "/bot full reply",
+    }
+    for key, label in labels.items():
+        values = timings[key]
+        print(f"{label:<30} p50 {percentile(values, 50) * 1000:7.1f} ms   p99 {percentile(values, 99) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
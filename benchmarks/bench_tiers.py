@@ -0,0 +1,71 @@
+"""
+Offline accuracy and latency of the three classification tiers.
+
+Runs every labeled example through the keyword rules, the local centroid
+model and (optionally) the LLM, and reports per tier how many examples it
+answered, how many of those it got right and how long it took. The last
+block is the production cascade: rules, then the local model, then the LLM.
+
+Without --llm-url the LLM tier is skipped and the cascade reports how many
+messages would have been sent to it.
+
+Usage:
+    python -m benchmarks.bench_tiers --data data/classifier_eval.jsonl
+    python -m benchmarks.bench_tiers --llm-url http://localhost:11434
+"""
+import argparse
+import asyncio
+import time
+
+import backends
+import classifier
+import local_classifier
+from benchmarks.stats import percentile
+
+
+def tier_report(name, examples, fn):
+    answered = correct = 0
+    latencies = []
+    for text, category in examples:
+        started = time.perf_counter()
+        result = fn(text)
+        latencies.append(time.perf_counter() - started)
+        if result is not None:
+            answered += 1
+            correct += result["category"] == category
+    print(
+        f"{name:<14} answered {answered:3d}/{len(examples)}  "
+        f"accuracy {correct / answered if answered else 0:6.1%}  "
+        f"p50 {percentile(latencies, 50) * 1e6:9.1f} us  p99 {percentile(latencies, 99) * 1e6:9.1f} us"
+    )
+    return latencies
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Compare the classification tiers on labeled examples.")
+    parser.add_argument("--data", default="data/classifier_eval.jsonl")
+    parser.add_argument("--llm-url", help="Ollama base URL; the LLM tier is skipped without it")
+    args = parser.parse_args()
+
+    examples = local_classifier.read_examples(args.data)
+    model = local_classifier.get_model()
+    print(f"{len(examples)} examples, local model {model.version if model else 'missing'}")
+
+    tier_report("rules", examples, classifier._rule_classify)
+    tier_report("local model", examples, local_classifier.classify)
+
+    if args.llm_url:
+        backends.configure([args.llm_url])
+        loop = asyncio.new_event_loop()
+        tier_report("llm", examples, lambda t: loop.run_until_complete(classifier.llm_classify(t)).model_dump())
+        tier_report("cascade", examples, lambda t: loop.run_until_complete(classifier.classify_text(t)))
+        loop.close()
+    else:
+        print(f"{'llm':<14} skipped (no --llm-url)")
+        tier_report("rules+local", examples, classifier.classify_local)
+        to_llm = sum(classifier.classify_local(t) is None for t, _ in examples)
+        print(f"{'cascade':<14} {to_llm}/{len(examples)} messages would fall through to the LLM")
+
+
+if __name__ == "__main__":
+    main_cli()
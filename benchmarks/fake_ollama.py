@@ -0,0 +1,157 @@
+"""
+Deterministic stand-in for Ollama's /api/chat and /api/tags endpoints, used by
+the benchmarks.
+
+Classifier requests (recognised by the classifier system prompt) get a JSON
+classification back, or a JSON array of them when the user turn is a JSON
+array of messages; every other request gets a canned reply. Latency is
+simulated with asyncio.sleep so one process can serve a large burst:
+--latency-ms before the first word, then --token-ms per further word. With
+"stream": true the reply is sent as NDJSON chunks, one word per chunk.
+/api/tags lists app.state.models (mistral:latest by default).
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11434 --latency-ms 200 --token-ms 20
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+CANNED_REPLY = (
+    "Thanks for sharing what you're working on. A BEACH consultant will follow up "
+    "with you shortly to go over your situation in more detail."
+)
+
+
+def _classification_for(message: str) -> dict:
+    # Stable per-message category so repeated runs are comparable.
+    categories = ("business", "legal", "other")
+    return {
+        "category": categories[sum(message.encode()) % len(categories)],
+        "confidence": 0.8,
+        "flags": [],
+        "rationale": "Fake classification for benchmarking.",
+    }
+
+
+def create_app(latency_ms: float = 200.0, token_ms: float = 0.0, malformed_batches: bool = False) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.malformed_batches = malformed_batches
+    # Optional message -> category answers, e.g. from a labeled data set.
+    app.state.labels = {}
+    app.state.models = ["mistral:latest"]
+
+    def classification_for(message: str) -> dict:
+        result = _classification_for(message)
+        if message in app.state.labels:
+            result["category"] = app.state.labels[message]
+        return result
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name} for name in app.state.models]}
+
+    @app.post("/api/chat")
+    async def chat(payload: dict):
+        app.state.calls += 1
+        started = time.perf_counter_ns()
+        await asyncio.sleep(latency_ms / 1000)
+
+        messages = payload.get("messages", [])
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+
+        if system.startswith("You are a strict classifier"):
+            try:
+                batch = json.loads(user)
+            except json.JSONDecodeError:
+                batch = None
+            if isinstance(batch, list) and app.state.malformed_batches:
+                content = "Here are the classifications you asked for."
+            elif isinstance(batch, list):
+                content = json.dumps([classification_for(m) for m in batch])
+            else:
+                content = json.dumps(classification_for(user))
+        else:
+            content = CANNED_REPLY
+
+        if payload.get("stream"):
+            return StreamingResponse(_stream(payload.get("model", ""), content), media_type="application/x-ndjson")
+
+        await asyncio.sleep((len(content.split(" ")) - 1) * token_ms / 1000)
+
+        return {
+            "model": payload.get("model", ""),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "total_duration": time.perf_counter_ns() - started,
+            "prompt_eval_count": sum(len(m["content"].split()) for m in messages),
+            "eval_count": len(content.split()),
+            "eval_duration": time.perf_counter_ns() - started,
+        }
+
+    async def _stream(model: str, content: str):
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(token_ms / 1000)
+            piece = word if i == 0 else " " + word
+            yield json.dumps({"model": model, "message": {"role": "assistant", "content": piece}, "done": False}) + "\n"
+        yield json.dumps({"model": model, "message": {"role": "assistant", "content": ""}, "done": True,
+                          "eval_count": len(words)}) + "\n"
+
+    return app
+
+
+class BackgroundServer:
+    """Runs an ASGI app under uvicorn on a background thread; usable as a context manager."""
+
+    def __init__(self, app, port: int):
+        self.app = app
+        self.port = port
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+class FakeOllamaServer(BackgroundServer):
+    def __init__(self, port: int = 11435, latency_ms: float = 200.0, token_ms: float = 0.0):
+        super().__init__(create_app(latency_ms, token_ms), port)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/api/chat"
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.token_ms), host="127.0.0.1", port=args.port)
@@ -0,0 +1,20 @@
+from typing import Dict, List
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile; `values` need not be sorted."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize(latencies_s: List[float], elapsed_s: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies_s),
+        "rps": len(latencies_s) / elapsed_s if elapsed_s else 0.0,
+        "p50_ms": percentile(latencies_s, 50) * 1000,
+        "p95_ms": percentile(latencies_s, 95) * 1000,
+        "p99_ms": percentile(latencies_s, 99) * 1000,
+    }
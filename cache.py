@@ -0,0 +1,228 @@
+"""
+Cache for deterministic Ollama chat calls.
+
+Keys combine the model name, a hash of the system prompt and the normalized
+text of the remaining turns, so "What does the Ciocca Center offer?" and
+"what does the ciocca center offer" share an entry. Only calls made with
+temperature 0 are cached; anything else is counted as a bypass.
+
+Backend is picked with LLM_CACHE_BACKEND: "memory" (default), "sqlite"
+(persists across restarts at LLM_CACHE_PATH) or "off". Both backends evict
+least-recently-used entries beyond LLM_CACHE_MAX_ENTRIES and expire entries
+older than LLM_CACHE_TTL seconds. SQLite reads and writes run in a worker
+thread so disk I/O never blocks the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL", "86400"))
+
+_WORD_RE = re.compile(r"\w+(?:[-'’]\w+)*")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def key_for(payload: dict) -> Optional[str]:
+    """
+    Cache key for an /api/chat payload, or None when the call is not
+    deterministic (temperature missing or nonzero).
+    """
+    if (payload.get("options") or {}).get("temperature") != 0:
+        return None
+
+    h = hashlib.sha256(payload.get("model", "").encode())
+    for m in payload.get("messages", []):
+        if m["role"] == "system":
+            h.update(b"\0system\0" + hashlib.sha256(m["content"].encode()).digest())
+        else:
+            h.update(f"\0{m['role']}\0{normalize(m['content'])}".encode())
+    return h.hexdigest()
+
+
+class Cache(ABC):
+    # Backends doing disk I/O are called through asyncio.to_thread by lookup/store.
+    blocking = False
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._count(self._get(key))
+
+    def _count(self, value: Optional[dict]) -> Optional[dict]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: dict) -> None:
+        self._set(key, value)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+        }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: dict) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryCache(Cache):
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        super().__init__(max_entries, ttl)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(Cache):
+    blocking = True
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        super().__init__(max_entries, ttl)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        self._db.commit()
+
+    def _get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] + self.ttl < now:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM cache")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+_cache: Optional[Cache] = None
+
+
+def get_cache() -> Optional[Cache]:
+    """The process-wide cache, or None when LLM_CACHE_BACKEND is "off"."""
+    global _cache
+    if _cache is None and CACHE_BACKEND != "off":
+        if CACHE_BACKEND == "sqlite":
+            _cache = SQLiteCache()
+        else:
+            _cache = MemoryCache()
+    return _cache
+
+
+async def lookup(payload: dict) -> Tuple[Optional[str], Optional[dict]]:
+    """
+    (key, cached response) for a payload. The key is None when caching is off
+    or the call is not deterministic; store() is then a no-op.
+    """
+    c = get_cache()
+    if c is None:
+        return None, None
+    key = key_for(payload)
+    if key is None:
+        c.bypasses += 1
+        return None, None
+    if c.blocking:
+        # Hit/miss counts stay on the event loop thread.
+        return key, c._count(await asyncio.to_thread(c._get, key))
+    return key, c.get(key)
+
+
+async def store(key: Optional[str], value: dict) -> None:
+    c = get_cache()
+    if c is None or key is None:
+        return
+    if c.blocking:
+        await asyncio.to_thread(c.set, key, value)
+    else:
+        c.set(key, value)
@@ -1,11 +1,30 @@
 from pydantic import BaseModel, Field
-import requests
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Set, Tuple
+import asyncio
 import re
 import json
+import os
 
-OLLAMA_URL = "http://localhost:11434/api/chat"
-MODEL_NAME = "mistral"
+import local_classifier
+import metrics
+import ollama_client
+from batcher import MicroBatcher
+
+MODEL_NAME = os.getenv("CLASSIFIER_MODEL", "mistral")
+# Deterministic output keeps classifications stable and lets the cache answer repeats.
+TEMPERATURE = 0.0
+
+# Optional micro-batching of LLM classifications under bursty load:
+# "off" sends one request per message, "prompt" packs a batch into a single
+# multi-item prompt, "concurrent" sends a batch's requests in parallel under
+# BATCH_CONCURRENCY upstream slots.
+BATCH_MODES = ("off", "prompt", "concurrent")
+BATCH_MODE = os.getenv("CLASSIFY_BATCH_MODE", "off")
+BATCH_MAX_ITEMS = int(os.getenv("CLASSIFY_BATCH_MAX_ITEMS", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFY_BATCH_MAX_WAIT_MS", "10"))
+BATCH_CONCURRENCY = int(os.getenv("CLASSIFY_BATCH_CONCURRENCY", "4"))
+if BATCH_MODE not in BATCH_MODES:
+    raise ValueError(f"CLASSIFY_BATCH_MODE must be one of {', '.join(BATCH_MODES)}, got {BATCH_MODE!r}")
 
 
 class ClassifyResponse(BaseModel):
@@ -37,56 +56,166 @@ BUSINESS_HINTS = [
 ]
 
 
-def rule_based_classify(text: str) -> Optional[ClassifyResponse]:
-    t = text.lower()
+CIOCCA_MENTION_PATTERN = r"\bciocca\b|\bciocca center\b"
+CIOCCA_INTENT_PATTERN = (
+    r"\bwhat is\b|\bwhat does\b|\bwhat can\b|\bservices?\b|\bhelp with\b|\boffer(s|ed)?\b|\babout\b|\bwebsite\b|\bsite\b|\bpage\b|\blink\b|\bwhere can i find\b|\bcontact\b"
+)
+
+# Every rule pattern gets a name: legal_<i>, business_<i>, ciocca and
+# ciocca_intent.
+_LEGAL_RULES = [(f"legal_{i}", flag) for i, (_, flag) in enumerate(LEGAL_PATTERNS)]
+_BUSINESS_RULES = [(f"business_{i}", flag) for i, (_, flag) in enumerate(BUSINESS_HINTS)]
+_RULE_PATTERNS: Dict[str, str] = {
+    **{name: pat for (name, _), (pat, _) in zip(_LEGAL_RULES, LEGAL_PATTERNS)},
+    **{name: pat for (name, _), (pat, _) in zip(_BUSINESS_RULES, BUSINESS_HINTS)},
+    "ciocca": CIOCCA_MENTION_PATTERN,
+    "ciocca_intent": CIOCCA_INTENT_PATTERN,
+}
+
+
+def _split_alternatives(pattern: str) -> List[str]:
+    """Split a regex on its top-level `|` (ignoring groups, classes and escapes)."""
+    parts, current, depth, i = [], "", 0, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            current += pattern[i:i + 2]
+            i += 2
+            continue
+        if ch == "[":
+            end = pattern.index("]", i + 1)
+            current += pattern[i:end + 1]
+            i = end + 1
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "|" and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+        i += 1
+    parts.append(current)
+    return parts
 
-    # 1) legal first
-    legal_hits = []
-    for pat, flag in LEGAL_PATTERNS:
-        if re.search(pat, t):
-            legal_hits.append(flag)
 
+def _literal_prefix(body: str) -> str:
+    """The plain characters a regex fragment must start with."""
+    prefix = ""
+    for i, ch in enumerate(body):
+        if ch in "\\()[]|.^$?*+{":
+            break
+        if body[i + 1:i + 2] in ("?", "*", "{"):
+            break
+        prefix += ch
+    return prefix
+
+
+def _compile_rules():
+    """
+    Build one regex that finds every rule hit in a single pass.
+
+    Every alternative of every rule is `\\b<literal char>...`, so the shared
+    `\\b` is hoisted out and alternatives are grouped by their first character;
+    the engine then only tries the branch for the character under the cursor.
+    An empty marker group at the end of each alternative says which rule hit.
+    The whole thing sits in a zero-width lookahead so overlapping hits (like
+    "go-to-market" and "market") are all reported.
+
+    The alternation stops at the first alternative that matches at a position,
+    which could hide a later one starting at the same place. That is only
+    possible when their literal prefixes agree, so each marker records the
+    later rules that could have been hidden behind it.
+    """
+    by_first_char: Dict[str, List[Tuple[str, str, str]]] = {}
+    for name, pattern in _RULE_PATTERNS.items():
+        for alt in _split_alternatives(pattern):
+            body = alt[2:]
+            if not alt.startswith(r"\b") or not body or not (body[0].isalnum() or body[0] == "®") \
+                    or body[1:2] in ("?", "*", "+", "{"):
+                raise ValueError(f"rule {name!r}: alternative {alt!r} must start with \\b and a literal character")
+            by_first_char.setdefault(body[0], []).append((name, body, _literal_prefix(body)))
+
+    branches = []
+    marker_rule: Dict[str, str] = {}
+    shadowed: Dict[str, List[str]] = {}
+    for ch, alts in by_first_char.items():
+        parts = []
+        for i, (name, body, prefix) in enumerate(alts):
+            marker = f"_m{len(marker_rule)}"
+            marker_rule[marker] = name
+            shadowed[marker] = sorted({
+                other for other, _, other_prefix in alts[i + 1:]
+                if other != name and (prefix.startswith(other_prefix) or other_prefix.startswith(prefix))
+            })
+            parts.append(f"{body[1:]}(?P<{marker}>)")
+        branches.append(f"{re.escape(ch)}(?:{'|'.join(parts)})")
+
+    return re.compile(rf"\b(?={'|'.join(branches)})"), marker_rule, shadowed
+
+
+_RULES_RE, _MARKER_RULE, _MARKER_SHADOWED = _compile_rules()
+_RULE_RES = {name: re.compile(pat) for name, pat in _RULE_PATTERNS.items()}
+
+
+def _rule_hits(t: str) -> Set[str]:
+    """Names of every rule pattern that matches somewhere in `t`."""
+    hits: Set[str] = set()
+    for m in _RULES_RE.finditer(t):
+        marker = m.lastgroup
+        hits.add(_MARKER_RULE[marker])
+        for name in _MARKER_SHADOWED[marker]:
+            if name not in hits and _RULE_RES[name].match(t, m.start()):
+                hits.add(name)
+    return hits
+
+
+def _rule_classify(text: str) -> Optional[dict]:
+    """Same result as rule_based_classify, as a plain dict."""
+    hits = _rule_hits(text.lower())
+    if not hits:
+        return None
+
+    # 1) legal first
+    legal_hits = [flag for name, flag in _LEGAL_RULES if name in hits]
     if legal_hits:
-        return ClassifyResponse(
-            category="legal",
-            confidence=0.95,
-            flags=sorted(list(set(legal_hits))),
-            rationale="Detected legal-related topic keywords."
-        )
+        return {
+            "category": "legal",
+            "confidence": 0.95,
+            "flags": sorted(set(legal_hits)),
+            "rationale": "Detected legal-related topic keywords.",
+        }
 
     # 2) business next
-    business_hits = []
-    for pat, flag in BUSINESS_HINTS:
-        if re.search(pat, t):
-            business_hits.append(flag)
-
+    business_hits = [flag for name, flag in _BUSINESS_RULES if name in hits]
     if business_hits:
-        return ClassifyResponse(
-            category="business",
-            confidence=0.75,
-            flags=sorted(list(set(business_hits))),
-            rationale="Detected business-related topic keywords."
-        )
+        return {
+            "category": "business",
+            "confidence": 0.75,
+            "flags": sorted(set(business_hits)),
+            "rationale": "Detected business-related topic keywords.",
+        }
 
     # 3) other (Ciocca Center informational/website) last
     # Logic: must mention ciocca AND show some informational/website intent
-    mentions_ciocca = re.search(r"\bciocca\b|\bciocca center\b", t) is not None
-    info_or_website_intent = re.search(
-        r"\bwhat is\b|\bwhat does\b|\bwhat can\b|\bservices?\b|\bhelp with\b|\boffer(s|ed)?\b|\babout\b|\bwebsite\b|\bsite\b|\bpage\b|\blink\b|\bwhere can i find\b|\bcontact\b",
-        t
-    ) is not None
-
-    if mentions_ciocca and info_or_website_intent:
-        return ClassifyResponse(
-            category="other",
-            confidence=0.85,
-            flags=["ciocca_center"],
-            rationale="Detected Ciocca Center informational inquiry."
-        )
+    if "ciocca" in hits and "ciocca_intent" in hits:
+        return {
+            "category": "other",
+            "confidence": 0.85,
+            "flags": ["ciocca_center"],
+            "rationale": "Detected Ciocca Center informational inquiry.",
+        }
 
     return None
 
 
+def rule_based_classify(text: str) -> Optional[ClassifyResponse]:
+    result = _rule_classify(text)
+    return ClassifyResponse(**result) if result else None
+
+
 CLASSIFIER_SYSTEM_PROMPT = """You are a strict classifier for a university consulting chatbot.
 
 Classify the user's message into exactly one category:
@@ -103,24 +232,16 @@ Rules:
 """
 
 
-def llm_classify(text: str) -> ClassifyResponse:
-    payload = {
-        "model": MODEL_NAME,
-        "messages": [
-            {"role": "system", "content": CLASSIFIER_SYSTEM_PROMPT},
-            {"role": "user", "content": text},
-        ],
-        "stream": False
-    }
+CLASSIFIER_BATCH_SYSTEM_PROMPT = CLASSIFIER_SYSTEM_PROMPT + """
+The user turn is a JSON array of messages. Classify each one independently and
+output only a JSON array with exactly one object per message, in the same order,
+each matching the schema above.
+"""
 
-    r = requests.post(OLLAMA_URL, json=payload, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    content = data["message"]["content"].strip()
 
-    try:
-        obj = json.loads(content)
-    except json.JSONDecodeError:
+def _coerce_classification(obj) -> ClassifyResponse:
+    """Turn the model's JSON (possibly malformed) into a ClassifyResponse."""
+    if not isinstance(obj, dict):
         return ClassifyResponse(
             category="legal",
             confidence=0.6,
@@ -155,11 +276,150 @@ def llm_classify(text: str) -> ClassifyResponse:
     return ClassifyResponse(category=cat, confidence=conf, flags=flags, rationale=rationale)
 
 
-def classify_text(text: str) -> dict:
+async def llm_classify(text: str) -> ClassifyResponse:
+    payload = {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": CLASSIFIER_SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ],
+        "stream": False,
+        "options": {"temperature": TEMPERATURE},
+    }
+
+    data = await ollama_client.chat(payload)
+    content = data["message"]["content"].strip()
+
+    try:
+        obj = json.loads(content)
+    except json.JSONDecodeError:
+        obj = None
+    return _coerce_classification(obj)
+
+
+async def llm_classify_many(texts: List[str]) -> List[ClassifyResponse]:
+    """
+    Classify several messages with one multi-item prompt. Falls back to one
+    llm_classify call per message when the reply is not a JSON array with
+    one entry per message.
+    """
+    unique = list(dict.fromkeys(texts))
+    if len(unique) == 1:
+        result = await llm_classify(unique[0])
+        return [result] * len(texts)
+
+    payload = {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": CLASSIFIER_BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps(unique)},
+        ],
+        "stream": False,
+        "options": {"temperature": TEMPERATURE},
+    }
+
+    # Normalizing the array for a cache key would erase where one message ends
+    # and the next begins, so different batches could share an entry.
+    data = await ollama_client.chat(payload, cacheable=False)
+    content = data["message"]["content"].strip()
+
+    try:
+        objs = json.loads(content)
+    except json.JSONDecodeError:
+        objs = None
+    if isinstance(objs, list) and len(objs) == len(unique) and all(isinstance(o, dict) for o in objs):
+        by_text = {t: _coerce_classification(o) for t, o in zip(unique, objs)}
+    else:
+        results = await asyncio.gather(*(llm_classify(t) for t in unique))
+        by_text = dict(zip(unique, results))
+    return [by_text[t] for t in texts]
+
+
+_batcher: Optional[MicroBatcher] = None
+_batch_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def _llm_classify_concurrently(texts: List[str]) -> List[ClassifyResponse]:
+    """One llm_classify per message, sharing BATCH_CONCURRENCY slots across batches."""
+    global _batch_semaphore
+    if _batch_semaphore is None:
+        _batch_semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def one(text: str) -> ClassifyResponse:
+        async with _batch_semaphore:
+            return await llm_classify(text)
+
+    return await asyncio.gather(*(one(t) for t in texts))
+
+
+
+def _get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        handler = {"prompt": llm_classify_many, "concurrent": _llm_classify_concurrently}[BATCH_MODE]
+        _batcher = MicroBatcher(handler, BATCH_MAX_ITEMS, BATCH_MAX_WAIT_MS)
+    return _batcher
+
+
+async def classify_with_llm(text: str) -> dict:
+    """The LLM tier, through the micro-batcher when batching is enabled."""
+    with metrics.span("llm_classify"):
+        if BATCH_MODE == "off":
+            result = (await llm_classify(text)).model_dump()
+        else:
+            result = (await _get_batcher().submit(text)).model_dump()
+    metrics.CLASSIFICATIONS.inc("llm", result["category"])
+    return result
+
+
+def classify_local(text: str, previous: Optional[dict] = None) -> Optional[dict]:
+    """
+    Keyword rules, then the local centroid model, then `previous` (the
+    session's last classification, so a conversation that stays on topic is
+    not sent back to the LLM every turn). None means ask the LLM.
+
+    `previous` is only reused when it is legal, or when the local model's
+    below-threshold guess agrees with it. Anything else goes to the LLM,
+    which applies the "if unsure, choose legal" default; reusing a business
+    or other label there could answer a legal question with advice.
+    """
+    with metrics.span("rule_based_classify"):
+        result = _rule_classify(text)
+    if result is not None:
+        metrics.CLASSIFICATIONS.inc("rules", result["category"])
+        return result
+
+    with metrics.span("local_classify"):
+        result = local_classifier.classify(text)
+    if result is not None:
+        metrics.CLASSIFICATIONS.inc("local", result["category"])
+        return result
+
+    if previous is not None and (
+        previous["category"] == "legal" or local_classifier.guess(text) == previous["category"]
+    ):
+        metrics.CLASSIFICATIONS.inc("session", previous["category"])
+        return previous
+    return None
+
+
+async def classify_text(text: str, previous: Optional[dict] = None) -> dict:
     """
     Returns a plain dict suitable for routing.
     Example:
     {"category":"business","confidence":0.75,"flags":[...],"rationale":"..."}
     """
-    classification = rule_based_classify(text) or llm_classify(text)
-    return classification.model_dump()
\ No newline at end of file
+    return classify_local(text, previous) or await classify_with_llm(text)
+
+
+async def classify_batch(texts: List[str]) -> List[dict]:
+    """
+    classify_text over a list of messages. Rule and local-model hits are
+    resolved inline and the remaining messages go to llm_classify concurrently.
+    """
+    results: List[Optional[dict]] = [classify_local(t) for t in texts]
+    misses = [i for i, r in enumerate(results) if r is None]
+    llm_results = await asyncio.gather(*(classify_with_llm(texts[i]) for i in misses))
+    for i, classification in zip(misses, llm_results):
+        results[i] = classification
+    return results
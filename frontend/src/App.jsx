@@ -1,20 +1,40 @@
-import { useMemo, useState } from "react";
+import { useMemo, useRef, useState } from "react";
 
 const API_BASE = "http://127.0.0.1:8000";
 
-async function sendToBackend(message) {
-  const res = await fetch(`${API_BASE}/bot`, {
+class SessionExpiredError extends Error {}
+
+// Streams NDJSON events from /bot/stream: "session" (when a session is in use),
+// one "classification", then "token" events as the reply is generated, then
+// "done" (or "error"). Without a sessionId the server starts a new session.
+async function streamFromBackend(message, sessionId, onEvent) {
+  const res = await fetch(`${API_BASE}/bot/stream`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ message }),
+    body: JSON.stringify(sessionId ? { message, session_id: sessionId } : { message, new_session: true }),
   });
 
+  if (res.status === 404 && sessionId) {
+    throw new SessionExpiredError("Session expired");
+  }
   if (!res.ok) {
     const text = await res.text();
     throw new Error(`Backend error ${res.status}: ${text}`);
   }
 
-  return res.json();
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (line.trim()) onEvent(JSON.parse(line));
+    }
+  }
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
 }
 
 function Badge({ label }) {
@@ -49,6 +69,8 @@ export default function App() {
     },
   ]);
   const [input, setInput] = useState("");
+  // Server-issued id for this conversation; set from the first "session" event.
+  const sessionId = useRef(null);
 
   function addMessage(m) {
     setMessages((prev) => [...prev, m]);
@@ -62,37 +84,56 @@ export default function App() {
     addMessage({ role: "user", text });
     setInput("");
 
-    const typingId = crypto.randomUUID();
+    const replyId = crypto.randomUUID();
     addMessage({
-      id: typingId,
+      id: replyId,
       role: "bot",
       text: "…",
       meta: { category: "loading", confidence: null },
     });
 
+    function updateReply(update) {
+      setMessages((prev) => prev.map((m) => (m.id === replyId ? update(m) : m)));
+    }
+
+    let started = false;
+    function onEvent(event) {
+      if (event.type === "session") {
+        sessionId.current = event.session_id;
+      } else if (event.type === "classification") {
+        updateReply((m) => ({
+          ...m,
+          meta: {
+            category: event.classification?.category ?? "unknown",
+            confidence: event.classification?.confidence ?? 0,
+            // backend currently doesn't return followups, so this will just be []
+            followups: event.classification?.followups ?? [],
+          },
+        }));
+      } else if (event.type === "token") {
+        const first = !started;
+        started = true;
+        updateReply((m) => ({ ...m, text: first ? event.content : m.text + event.content }));
+      } else if (event.type === "error") {
+        throw new Error(event.detail);
+      }
+    }
+
     try {
-      const data = await sendToBackend(text);
-
-      // remove typing bubble
-      setMessages((prev) => prev.filter((m) => m.id !== typingId));
-
-      addMessage({
-        role: "bot",
-        text: data.reply,
-        meta: {
-          category: data.classification?.category ?? "unknown",
-          confidence: data.classification?.confidence ?? 0,
-          // backend currently doesn't return followups, so this will just be []
-          followups: data.classification?.followups ?? [],
-        },
-      });
+      try {
+        await streamFromBackend(text, sessionId.current, onEvent);
+      } catch (err) {
+        if (!(err instanceof SessionExpiredError)) throw err;
+        // The server dropped the session (idle or restarted): start a new one.
+        sessionId.current = null;
+        await streamFromBackend(text, null, onEvent);
+      }
     } catch (err) {
-      setMessages((prev) => prev.filter((m) => m.id !== typingId));
-      addMessage({
-        role: "bot",
+      updateReply((m) => ({
+        ...m,
         text: `Backend error: ${err.message}`,
         meta: { category: "error", confidence: 0 },
-      });
+      }));
     }
   }
 
@@ -0,0 +1,221 @@
+"""
+Local nearest-centroid classifier that sits between the keyword rules and
+the LLM in classify_text.
+
+Messages are turned into hashed character and word n-gram vectors, and each
+category is the normalized mean of its training vectors. The closest centroid
+wins; a softmax over the cosine similarities gives the confidence, and only
+answers at or above the artifact's threshold are used. Everything runs on the
+CPU with NumPy and no network.
+
+Train and export a model artifact:
+    python -m local_classifier train --data data/classifier_train.jsonl --out models/local_classifier.npz
+
+Check it against held-out examples:
+    python -m local_classifier eval --data data/classifier_eval.jsonl
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the vectorizer or artifact layout changes; old artifacts are then
+# ignored instead of producing nonsense scores.
+FORMAT_VERSION = 1
+
+MODEL_PATH = os.getenv(
+    "LOCAL_CLASSIFIER_PATH", os.path.join(os.path.dirname(__file__), "models", "local_classifier.npz")
+)
+THRESHOLD = os.getenv("LOCAL_CLASSIFIER_THRESHOLD")
+
+N_FEATURES = 2 ** 14
+CHAR_NGRAMS = (3, 5)
+SOFTMAX_TEMPERATURE = 0.05
+DEFAULT_THRESHOLD = 0.7
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _features(text: str) -> List[str]:
+    t = " ".join(text.lower().split())
+    padded = f" {t} "
+    grams = [
+        padded[i:i + n]
+        for n in range(CHAR_NGRAMS[0], CHAR_NGRAMS[1] + 1)
+        for i in range(len(padded) - n + 1)
+    ]
+    words = _WORD_RE.findall(t)
+    grams += [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    return grams
+
+
+def vectorize(text: str, n_features: int = N_FEATURES) -> np.ndarray:
+    """L2-normalized, log-scaled hashed n-gram counts."""
+    idx = np.fromiter((zlib.crc32(g.encode()) for g in _features(text)), dtype=np.uint32)
+    v = np.bincount(idx % n_features, minlength=n_features).astype(np.float32)
+    np.log1p(v, out=v)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class LocalClassifier:
+    def __init__(self, categories: List[str], centroids: np.ndarray, threshold: float,
+                 temperature: float = SOFTMAX_TEMPERATURE, version: str = ""):
+        self.categories = categories
+        self.centroids = centroids
+        self.threshold = threshold
+        self.temperature = temperature
+        self.version = version
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], threshold: float = DEFAULT_THRESHOLD) -> "LocalClassifier":
+        by_category = {}
+        for text, category in examples:
+            by_category.setdefault(category, []).append(vectorize(text))
+        categories = sorted(by_category)
+        centroids = np.stack([np.mean(by_category[c], axis=0) for c in categories])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        digest = hashlib.sha256(centroids.tobytes()).hexdigest()[:12]
+        return cls(categories, centroids.astype(np.float32), threshold, version=f"{FORMAT_VERSION}-{digest}")
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        scores = self.centroids @ vectorize(text, self.centroids.shape[1])
+        z = np.exp((scores - scores.max()) / self.temperature)
+        probs = z / z.sum()
+        best = int(np.argmax(probs))
+        return self.categories[best], float(probs[best])
+
+    def classify(self, text: str) -> Optional[dict]:
+        """A classify_text-shaped dict when confident enough, else None."""
+        category, confidence = self.predict(text)
+        if confidence < self.threshold:
+            return None
+        return {
+            "category": category,
+            "confidence": round(confidence, 4),
+            "flags": ["local_model"],
+            "rationale": "Matched by local centroid model.",
+        }
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            format_version=FORMAT_VERSION,
+            version=self.version,
+            categories=np.array(self.categories),
+            centroids=self.centroids,
+            threshold=self.threshold,
+            temperature=self.temperature,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        with np.load(path) as f:
+            if int(f["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path}: artifact format {int(f['format_version'])}, expected {FORMAT_VERSION}")
+            return cls(
+                categories=[str(c) for c in f["categories"]],
+                centroids=f["centroids"],
+                threshold=float(f["threshold"]),
+                temperature=float(f["temperature"]),
+                version=str(f["version"]),
+            )
+
+
+_model: Optional[LocalClassifier] = None
+_load_attempted = False
+
+
+def get_model() -> Optional[LocalClassifier]:
+    """
+    The shared model, loaded on first use. Returns None (tier disabled) when
+    the artifact is missing or from an incompatible version.
+    """
+    global _model, _load_attempted
+    if not _load_attempted:
+        _load_attempted = True
+        try:
+            _model = LocalClassifier.load(MODEL_PATH)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("local classifier disabled: %s", e)
+            _model = None
+        if _model is not None and THRESHOLD is not None:
+            _model.threshold = float(THRESHOLD)
+    return _model
+
+
+def classify(text: str) -> Optional[dict]:
+    model = get_model()
+    return model.classify(text) if model else None
+
+
+def guess(text: str) -> Optional[str]:
+    """The model's best category even below its threshold; None without a model."""
+    model = get_model()
+    return model.predict(text)[0] if model else None
+
+
+def read_examples(path: str) -> List[Tuple[str, str]]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            examples.append((row["text"], row["category"]))
+    return examples
+
+
+def _evaluate(model: LocalClassifier, examples: List[Tuple[str, str]]) -> dict:
+    correct = answered = answered_correct = 0
+    started = time.perf_counter()
+    for text, category in examples:
+        predicted, confidence = model.predict(text)
+        correct += predicted == category
+        if confidence >= model.threshold:
+            answered += 1
+            answered_correct += predicted == category
+    elapsed = time.perf_counter() - started
+    return {
+        "examples": len(examples),
+        "accuracy": correct / len(examples),
+        "coverage": answered / len(examples),
+        "accuracy_when_confident": answered_correct / answered if answered else 0.0,
+        "us_per_message": elapsed / len(examples) * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or evaluate the local classifier.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_p = sub.add_parser("train", help="train from labeled JSONL and export an artifact")
+    train_p.add_argument("--data", default="data/classifier_train.jsonl")
+    train_p.add_argument("--out", default=MODEL_PATH)
+    train_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    eval_p = sub.add_parser("eval", help="evaluate an artifact on labeled JSONL")
+    eval_p.add_argument("--data", default="data/classifier_eval.jsonl")
+    eval_p.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        examples = read_examples(args.data)
+        model = LocalClassifier.train(examples, threshold=args.threshold)
+        model.save(args.out)
+        print(f"trained {model.version} on {len(examples)} examples -> {args.out}")
+        print(json.dumps(_evaluate(model, examples), indent=2))
+    else:
+        model = LocalClassifier.load(args.model)
+        print(f"model {model.version}, threshold {model.threshold}")
+        print(json.dumps(_evaluate(model, read_examples(args.data)), indent=2))
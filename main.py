@@ -1,10 +1,36 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import json
+import logging
+import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Optional
+from pydantic import BaseModel, Field
 from classifier import classify_text
-from router import route
+from router import route, route_stream
 from fastapi.middleware.cors import CORSMiddleware
+import cache
+import local_classifier
+import metrics
+import ollama_client
+import sessions
+import speculation
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Adds a per-request Server-Timing header with the pipeline stage timings.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    local_classifier.get_model()
+    ollama_client.start_health_checks()
+    yield
+    await ollama_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,19 +44,105 @@ app.add_middleware(
 )
 
 
+if SERVER_TIMING:
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        spans = metrics.collect_spans()
+        response = await call_next(request)
+        if spans:
+            response.headers["Server-Timing"] = metrics.server_timing(spans)
+        return response
+
+
 class ChatRequest(BaseModel):
     message: str
+    # Multi-turn conversations: send new_session on the first turn, then the
+    # session_id the server returns. Without either, the turn is stateless.
+    session_id: Optional[str] = Field(None, min_length=1, max_length=128)
+    new_session: bool = False
+
+
+async def _session_for(req: ChatRequest) -> Optional[sessions.Session]:
+    if req.session_id:
+        session = await sessions.load(req.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired session")
+        return session
+    return await sessions.create() if req.new_session else None
 
 @app.get("/chat")
 def chat():
     return "Hello world"
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # async so render() runs on the event loop thread, which owns the metrics.
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats():
+    c = cache.get_cache()
+    return c.stats() if c else {"backend": "off"}
+
+@app.get("/sessions/stats")
+def session_stats():
+    return sessions.get_store().stats()
+
 @app.post("/bot")
-def bot(req: ChatRequest):
-    classification = classify_text(req.message) 
-    reply = route(req.message, classification)  
+async def bot(req: ChatRequest):
+    session = await _session_for(req)
+    history = session.context() if session else []
+    previous = session.previous_classification() if session else None
+
+    if speculation.ENABLED:
+        classification, reply = await speculation.classify_and_route(req.message, history, previous)
+    else:
+        classification = await classify_text(req.message, previous)
+        reply = await route(req.message, classification, history)
 
-    return {
+    response = {
         "reply": reply,
         "classification": classification,
-    }
\ No newline at end of file
+    }
+    if session is not None:
+        session.record(req.message, reply, classification)
+        await sessions.save(session)
+        response["session_id"] = session.id
+    return response
+
+
+@app.post("/bot/stream")
+async def bot_stream(req: ChatRequest):
+    """
+    Same pipeline as /bot, streamed as NDJSON: one "classification" event,
+    then a "token" event per chunk Ollama produces, then "done". Any failure,
+    including in classification, ends the stream with an "error" event. A
+    session turn starts with a "session" event carrying the id, and only
+    records the turn once the reply has streamed in full.
+    """
+    session = await _session_for(req)
+    history = session.context() if session else []
+    previous = session.previous_classification() if session else None
+
+    async def events():
+        if session is not None:
+            yield json.dumps({"type": "session", "session_id": session.id}) + "\n"
+        parts = []
+        try:
+            classification = await classify_text(req.message, previous)
+            yield json.dumps({"type": "classification", "classification": classification}) + "\n"
+            async for token in route_stream(req.message, classification, history):
+                if session is not None:
+                    parts.append(token)
+                yield json.dumps({"type": "token", "content": token}) + "\n"
+        except Exception:
+            # The 200 is already sent, so failures are reported in-band.
+            logger.exception("/bot/stream failed")
+            yield json.dumps({"type": "error", "detail": "The assistant is unavailable right now."}) + "\n"
+            return
+        if session is not None:
+            session.record(req.message, "".join(parts), classification)
+            await sessions.save(session)
+        yield json.dumps({"type": "done"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -0,0 +1,151 @@
+"""
+Lightweight in-process metrics, rendered in the Prometheus text format.
+
+Counters and histograms are plain dicts keyed by label values; everything
+runs on the event loop thread, so no locking is needed. span() times a block
+into the stage histogram and, when Server-Timing is enabled for the current
+request, also records it for the response header.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in sorted(self.values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        row = self.values.get(labels)
+        if row is None:
+            row = self.values[labels] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for k, row in sorted(self.values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), row):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), k + (str(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, k)} {row[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, k)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for m in _registry for line in m.render()) + "\n"
+
+
+STAGE_SECONDS = Histogram("bot_stage_seconds", "Time spent in each /bot pipeline stage.", ["stage"])
+CLASSIFICATIONS = Counter("bot_classifications_total", "Classifications by tier and category.", ["tier", "category"])
+OLLAMA_REQUEST_SECONDS = Histogram("ollama_request_seconds", "Upstream Ollama request latency.", ["model"])
+OLLAMA_ERRORS = Counter("ollama_errors_total", "Failed upstream Ollama requests by kind.", ["model", "kind"])
+OLLAMA_PROMPT_TOKENS = Histogram(
+    "ollama_prompt_tokens", "prompt_eval_count reported by Ollama.", ["model"], TOKEN_BUCKETS
+)
+OLLAMA_EVAL_TOKENS = Histogram("ollama_eval_tokens", "eval_count reported by Ollama.", ["model"], TOKEN_BUCKETS)
+OLLAMA_EVAL_SECONDS = Histogram("ollama_eval_seconds", "eval_duration reported by Ollama.", ["model"])
+OLLAMA_TOTAL_SECONDS = Histogram("ollama_total_seconds", "total_duration reported by Ollama.", ["model"])
+
+# Per-request list of (stage, seconds) for the Server-Timing header; None
+# when the header is not being collected for this request.
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+class span:
+    """Context manager timing a block into bot_stage_seconds{stage=...}."""
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(elapsed, self.stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((self.stage, elapsed))
+
+
+def collect_spans() -> List[Tuple[str, float]]:
+    """Start collecting spans for the current request and return the list."""
+    spans: List[Tuple[str, float]] = []
+    _request_spans.set(spans)
+    return spans
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in spans)
+
+
+def record_ollama_response(model: str, data: dict) -> None:
+    """Token counts and durations from an Ollama response (durations are in ns)."""
+    if "prompt_eval_count" in data:
+        OLLAMA_PROMPT_TOKENS.observe(data["prompt_eval_count"], model)
+    if "eval_count" in data:
+        OLLAMA_EVAL_TOKENS.observe(data["eval_count"], model)
+    if "eval_duration" in data:
+        OLLAMA_EVAL_SECONDS.observe(data["eval_duration"] / 1e9, model)
+    if "total_duration" in data:
+        OLLAMA_TOTAL_SECONDS.observe(data["total_duration"] / 1e9, model)
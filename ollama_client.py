@@ -0,0 +1,232 @@
+"""
+Shared async HTTP client for every Ollama call.
+
+One pooled httpx.AsyncClient keeps connections alive between calls, and a
+semaphore caps how many requests are in flight upstream at once so a burst of
+/bot traffic queues here instead of overwhelming the inference box.
+
+Identical non-streaming calls that overlap in time are coalesced: the first
+one starts the upstream request and the rest wait on the same result.
+
+Which Ollama server a call goes to is decided by the backend pool (see
+backends.py). Connection failures eject the backend and are retried with
+exponential backoff, on another backend when there is one.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+import backends
+import cache
+import metrics
+
+MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "32"))
+TIMEOUT_SECONDS = float(os.getenv("OLLAMA_TIMEOUT", "60"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+KEEPALIVE_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE", "30"))
+RETRIES = int(os.getenv("OLLAMA_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.1"))
+
+# Errors where the request never reached Ollama, so it is safe to resend.
+_RETRYABLE = (httpx.ConnectError, httpx.ConnectTimeout)
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+_inflight: Dict[str, _Flight] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONCURRENCY,
+                max_keepalive_connections=MAX_CONCURRENCY,
+                keepalive_expiry=KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+        )
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _semaphore
+
+
+@contextmanager
+def _upstream(model: str):
+    """Times one upstream request and counts it by failure kind if it fails."""
+    started = time.perf_counter()
+    try:
+        yield
+    except httpx.TimeoutException:
+        metrics.OLLAMA_ERRORS.inc(model, "timeout")
+        raise
+    except httpx.HTTPStatusError:
+        metrics.OLLAMA_ERRORS.inc(model, "http_status")
+        raise
+    except httpx.TransportError:
+        metrics.OLLAMA_ERRORS.inc(model, "connection")
+        raise
+    finally:
+        metrics.OLLAMA_REQUEST_SECONDS.observe(time.perf_counter() - started, model)
+
+
+def upstream_saturated() -> bool:
+    """True when every upstream slot is taken and new calls would queue."""
+    return _semaphore is not None and _semaphore.locked()
+
+
+def _flight_key(payload: dict) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _request_timeout(timeout: Optional[float]):
+    return httpx.Timeout(timeout, connect=CONNECT_TIMEOUT_SECONDS) if timeout else httpx.USE_CLIENT_DEFAULT
+
+
+async def _coalesced(key: str, call: Callable[[], Awaitable[dict]]) -> dict:
+    """
+    Run `call` once per key among concurrent callers and share its outcome.
+
+    The upstream request runs in its own task, so a caller being cancelled
+    (e.g. its client disconnected) does not cancel it for the others; it is
+    only cancelled once every caller has gone. Exceptions reach all callers.
+    """
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _Flight(asyncio.ensure_future(call()))
+        _inflight[key] = flight
+
+        def _done(_task, flight=flight):
+            if _inflight.get(key) is flight:
+                del _inflight[key]
+
+        flight.task.add_done_callback(_done)
+
+    flight.waiters += 1
+    try:
+        return await asyncio.shield(flight.task)
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            if _inflight.get(key) is flight:
+                del _inflight[key]
+            flight.task.cancel()
+
+
+async def chat(payload: dict, timeout: Optional[float] = None, cacheable: bool = True) -> dict:
+    """
+    POST a non-streaming /api/chat payload and return the decoded JSON body.
+    Deterministic calls are answered from the cache when possible, and
+    identical concurrent calls share one upstream request. cacheable=False
+    skips the cache for payloads whose normalized key would not identify
+    them, such as a JSON array of messages.
+    """
+    key, cached = await cache.lookup(payload) if cacheable else (None, None)
+    if cached is not None:
+        return cached
+
+    async def call() -> dict:
+        model = payload.get("model", "")
+        pool = backends.get_pool()
+        failed = []
+        for attempt in range(RETRIES + 1):
+            # The slot is held per attempt, so a backoff does not keep it from other calls.
+            async with _get_semaphore():
+                backend = pool.pick(model, avoid=failed)
+                backend.outstanding += 1
+                try:
+                    with _upstream(model):
+                        r = await get_client().post(backend.chat_url, json=payload, timeout=_request_timeout(timeout))
+                        r.raise_for_status()
+                    break
+                except _RETRYABLE:
+                    pool.mark_failed(backend)
+                    failed.append(backend)
+                    if attempt == RETRIES:
+                        raise
+                finally:
+                    backend.outstanding -= 1
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        data = r.json()
+        metrics.record_ollama_response(model, data)
+        await cache.store(key, data)
+        return data
+
+    return await _coalesced(_flight_key(payload), call)
+
+
+async def stream_chat(payload: dict, timeout: Optional[float] = None) -> AsyncIterator[dict]:
+    """
+    POST a streaming /api/chat payload and yield each NDJSON chunk as it arrives.
+
+    A cached reply is replayed as a single final chunk, but streamed replies
+    are never stored, so nothing is buffered beyond the current line.
+    Connection failures are retried only before the first chunk.
+    """
+    _, cached = await cache.lookup(payload)
+    if cached is not None:
+        yield {**cached, "done": True}
+        return
+
+    model = payload.get("model", "")
+    pool = backends.get_pool()
+    failed = []
+    for attempt in range(RETRIES + 1):
+        async with _get_semaphore():
+            backend = pool.pick(model, avoid=failed)
+            backend.outstanding += 1
+            try:
+                with _upstream(model):
+                    async with get_client().stream(
+                        "POST", backend.chat_url, json=payload, timeout=_request_timeout(timeout)
+                    ) as r:
+                        r.raise_for_status()
+                        async for line in r.aiter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            if chunk.get("done"):
+                                metrics.record_ollama_response(model, chunk)
+                            yield chunk
+                return
+            except _RETRYABLE:
+                pool.mark_failed(backend)
+                failed.append(backend)
+                if attempt == RETRIES:
+                    raise
+            finally:
+                backend.outstanding -= 1
+        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def start_health_checks() -> None:
+    backends.get_pool().start()
+
+
+async def aclose() -> None:
+    global _client, _semaphore
+    await backends.get_pool().stop()
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _semaphore = None
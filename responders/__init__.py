@@ -0,0 +1,41 @@
+"""
+Responders for each category. Every module only defines its system prompt;
+the payload, the full reply and the token stream are built here the same way
+for all of them.
+"""
+import os
+from typing import AsyncIterator, List
+
+import ollama_client
+
+MODEL_NAME = os.getenv("RESPONDER_MODEL", "mistral")
+# Ollama's default sampling unless RESPONDER_TEMPERATURE is set.
+TEMPERATURE = float(os.environ["RESPONDER_TEMPERATURE"]) if os.getenv("RESPONDER_TEMPERATURE") else None
+
+
+def build_payload(system_prompt: str, message: str, stream: bool = False, history: List[dict] = ()) -> dict:
+    payload = {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            *history,
+            {"role": "user", "content": message},
+        ],
+        "stream": stream,
+    }
+    if TEMPERATURE is not None:
+        payload["options"] = {"temperature": TEMPERATURE}
+    return payload
+
+
+async def respond(system_prompt: str, message: str, history: List[dict] = ()) -> str:
+    data = await ollama_client.chat(build_payload(system_prompt, message, history=history))
+    return data["message"]["content"]
+
+
+async def stream(system_prompt: str, message: str, history: List[dict] = ()) -> AsyncIterator[str]:
+    payload = build_payload(system_prompt, message, stream=True, history=history)
+    async for chunk in ollama_client.stream_chat(payload):
+        content = chunk.get("message", {}).get("content", "")
+        if content:
+            yield content
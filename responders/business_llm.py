@@ -1,8 +1,3 @@
-import requests
-
-OLLAMA_URL = "http://localhost:11434/api/chat"
-MODEL_NAME = "mistral"
-
 BUSINESS_ASSISTANT_PROMPT = """You are the BEACH Consulting Assistant, used to support BEACH clients
 (startups and small businesses) before they meet with student consultants.
 
@@ -23,16 +18,3 @@ Output format:
 2) 3–5 bullet follow-up questions.
 3) A short section titled "Summary for BEACH Consultants:" with 3–6 bullets.
 """
-
-def respond(message: str) -> str:
-    payload = {
-        "model": MODEL_NAME,
-        "messages": [
-            {"role": "system", "content": BUSINESS_ASSISTANT_PROMPT},
-            {"role": "user", "content": message},
-        ],
-        "stream": False,
-    }
-    r = requests.post(OLLAMA_URL, json=payload, timeout=60)
-    r.raise_for_status()
-    return r.json()["message"]["content"]
\ No newline at end of file
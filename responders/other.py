@@ -1,8 +1,3 @@
-import requests
-
-OLLAMA_URL = "http://localhost:11434/api/chat"
-MODEL_NAME = "mistral"
-
 OTHER_ASSISTANT_PROMPT = """You are the Ciocca Center Assistant.
 
 The user is asking informational questions about the Ciocca Center and/or its website.
@@ -19,16 +14,3 @@ Output format:
 2) 1 short bullet list of common things the Ciocca Center can help with.
 3) Up to 3 clarifying questions.
 """
-
-def respond(message: str) -> str:
-    payload = {
-        "model": MODEL_NAME,
-        "messages": [
-            {"role": "system", "content": OTHER_ASSISTANT_PROMPT},
-            {"role": "user", "content": message},
-        ],
-        "stream": False,
-    }
-    r = requests.post(OLLAMA_URL, json=payload, timeout=60)
-    r.raise_for_status()
-    return r.json()["message"]["content"]
\ No newline at end of file
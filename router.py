@@ -1,13 +1,29 @@
-from responders.legalPrompt import respond as legal_respond
-from responders.business_llm import respond as business_respond
-from responders.other import respond as other_respond
+from typing import AsyncIterator, List
 
-def route(message: str, classification: dict) -> str:
+import metrics
+import responders
+from responders import business_llm, legalPrompt, other
+
+PROMPTS = {
+    "legal": legalPrompt.LEGAL_REFUSAL_PROMPT,
+    "business": business_llm.BUSINESS_ASSISTANT_PROMPT,
+    "other": other.OTHER_ASSISTANT_PROMPT,
+}
+
+def _category(classification: dict) -> str:
     category = (classification.get("category") or "").lower()
+    return category if category in PROMPTS else "other"
+
+async def route(message: str, classification: dict, history: List[dict] = ()) -> str:
+    with metrics.span("route"):
+        category = _category(classification)
+        with metrics.span(f"respond_{category}"):
+            return await responders.respond(PROMPTS[category], message, history)
 
-    if category == "legal":
-        return legal_respond(message)
-    elif category == "business":
-        return business_respond(message)
-    else:
-        return other_respond(message)
\ No newline at end of file
+async def route_stream(message: str, classification: dict, history: List[dict] = ()) -> AsyncIterator[str]:
+    # The spans cover the whole stream, first token to last.
+    with metrics.span("route"):
+        category = _category(classification)
+        with metrics.span(f"respond_{category}"):
+            async for token in responders.stream(PROMPTS[category], message, history):
+                yield token
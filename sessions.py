@@ -0,0 +1,278 @@
+"""
+Server-side conversation sessions for /bot.
+
+A session holds the recent turns of one conversation verbatim plus a short
+summary of older ones, and both are sent to the responder as context. After
+each turn the verbatim turns are compacted to CONTEXT_TOKEN_BUDGET (estimated
+at four characters per token) by folding the oldest into the summary, which is
+capped at SUMMARY_TOKEN_BUDGET by dropping its oldest lines. The summary is
+extractive, one line with the opening sentence of each folded turn, so
+compaction never costs an Ollama call.
+
+The session also keeps its last classification, which classify_local falls
+back to before asking the LLM. After SESSION_RECLASSIFY_TURNS turns answered
+that way it is dropped, so a drifting conversation gets classified afresh.
+
+Session ids are issued by the server (create()) and are unguessable; load()
+only returns sessions it issued, so a client cannot attach to a conversation
+by inventing an id.
+
+Backend is picked with SESSION_BACKEND: "memory" (default) or "sqlite"
+(persists across restarts at SESSION_PATH; its queries run in a worker
+thread, off the event loop). Sessions idle for longer than
+SESSION_IDLE_SECONDS are evicted, and the memory backend also evicts the
+least recently used beyond SESSION_MAX_SESSIONS.
+"""
+import asyncio
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+
+import metrics
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_PATH = os.getenv("SESSION_PATH", "sessions.sqlite3")
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+SESSION_RECLASSIFY_TURNS = int(os.getenv("SESSION_RECLASSIFY_TURNS", "5"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("SESSION_CONTEXT_TOKENS", "1024"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SESSION_SUMMARY_TOKENS", "256"))
+
+SUMMARY_LINE_CHARS = 160
+
+COMPACTED_TURNS = metrics.Counter("bot_session_compacted_turns_total", "Turns folded into a session summary.")
+EVICTIONS = metrics.Counter("bot_session_evictions_total", "Sessions dropped by reason.", ["reason"])
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _summary_line(turn: dict) -> str:
+    first = _SENTENCE_END_RE.split(turn["content"].strip(), 1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[: SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    speaker = "User" if turn["role"] == "user" else "Assistant"
+    return f"- {speaker}: {first}"
+
+
+class Session:
+    __slots__ = ("id", "turns", "summary", "classification", "reused_turns", "updated")
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.turns: Deque[dict] = deque()
+        self.summary: Deque[str] = deque()
+        self.classification: Optional[dict] = None
+        self.reused_turns = 0
+        self.updated = time.time()
+
+    def context(self) -> List[dict]:
+        """Chat messages to insert between the system prompt and the new user turn."""
+        messages = list(self.turns)
+        if self.summary:
+            summary = "Summary of the earlier conversation:\n" + "\n".join(self.summary)
+            messages.insert(0, {"role": "system", "content": summary})
+        return messages
+
+    def previous_classification(self) -> Optional[dict]:
+        if self.reused_turns >= SESSION_RECLASSIFY_TURNS:
+            return None
+        return self.classification
+
+    def record(self, message: str, reply: str, classification: dict) -> None:
+        """Append one exchange, then compact back under the token budgets."""
+        if classification is self.classification:
+            self.reused_turns += 1
+        else:
+            self.classification = classification
+            self.reused_turns = 0
+        self.turns.append({"role": "user", "content": message})
+        self.turns.append({"role": "assistant", "content": reply})
+        self.updated = time.time()
+        self.compact()
+
+    def compact(self) -> None:
+        tokens = sum(estimate_tokens(t["content"]) for t in self.turns)
+        while self.turns and tokens > CONTEXT_TOKEN_BUDGET:
+            turn = self.turns.popleft()
+            tokens -= estimate_tokens(turn["content"])
+            self.summary.append(_summary_line(turn))
+            COMPACTED_TURNS.inc()
+
+        tokens = sum(estimate_tokens(line) for line in self.summary)
+        while self.summary and tokens > SUMMARY_TOKEN_BUDGET:
+            tokens -= estimate_tokens(self.summary.popleft())
+
+    def to_dict(self) -> dict:
+        return {
+            "turns": list(self.turns),
+            "summary": list(self.summary),
+            "classification": self.classification,
+            "reused_turns": self.reused_turns,
+            "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, session_id: str, data: dict) -> "Session":
+        session = cls(session_id)
+        session.turns.extend(data["turns"])
+        session.summary.extend(data["summary"])
+        session.classification = data["classification"]
+        session.reused_turns = data["reused_turns"]
+        session.updated = data["updated"]
+        return session
+
+
+class SessionStore(ABC):
+    # Stores doing disk I/O are called through asyncio.to_thread.
+    blocking = False
+
+    def __init__(self, idle_seconds: float = SESSION_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Session]:
+        ...
+
+    @abstractmethod
+    def save(self, session: Session) -> int:
+        """Store the session; returns how many idle sessions were swept on the way."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "sessions": len(self)}
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, max_sessions: int = SESSION_MAX_SESSIONS, idle_seconds: float = SESSION_IDLE_SECONDS):
+        super().__init__(idle_seconds)
+        self.max_sessions = max_sessions
+        # Least recently saved first, so idle sessions collect at the front.
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        self._evict_idle()
+        return self._sessions.get(session_id)
+
+    def save(self, session: Session) -> int:
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            EVICTIONS.inc("capacity")
+        return 0
+
+    def _evict_idle(self) -> None:
+        cutoff = time.time() - self.idle_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.updated >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            EVICTIONS.inc("idle")
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    blocking = True
+    # Idle rows are swept on every Nth save rather than on every request.
+    SWEEP_EVERY = 256
+
+    def __init__(self, path: str = SESSION_PATH, idle_seconds: float = SESSION_IDLE_SECONDS):
+        super().__init__(idle_seconds)
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+        self._db.commit()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE id = ? AND updated >= ?", (session_id, cutoff)
+            ).fetchone()
+        return Session.from_dict(session_id, json.loads(row[0])) if row else None
+
+    def save(self, session: Session) -> int:
+        # Runs in a worker thread, so the sweep is counted by the caller on the loop.
+        swept = 0
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated) VALUES (?, ?, ?)",
+                (session.id, json.dumps(session.to_dict()), session.updated),
+            )
+            self._saves += 1
+            if self._saves % self.SWEEP_EVERY == 0:
+                swept = self._db.execute(
+                    "DELETE FROM sessions WHERE updated < ?", (time.time() - self.idle_seconds,)
+                ).rowcount
+            self._db.commit()
+        return swept
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM sessions")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_store() -> SessionStore:
+    global _store
+    if _store is None:
+        _store = SQLiteSessionStore() if SESSION_BACKEND == "sqlite" else MemorySessionStore()
+    return _store
+
+
+async def _call(fn, *args):
+    return await asyncio.to_thread(fn, *args) if get_store().blocking else fn(*args)
+
+
+async def create() -> Session:
+    """A new, empty session under a fresh random id, stored so the id is recognised."""
+    session = Session(secrets.token_urlsafe(24))
+    await save(session)
+    return session
+
+
+async def load(session_id: str) -> Optional[Session]:
+    """The stored session, or None if the id was never issued or has been evicted."""
+    return await _call(get_store().get, session_id)
+
+
+async def save(session: Session) -> None:
+    swept = await _call(get_store().save, session)
+    if swept:
+        EVICTIONS.inc("idle", amount=swept)
@@ -0,0 +1,95 @@
+"""
+Speculative classify-and-respond for messages that need the LLM classifier.
+
+Without speculation an LLM-path message costs two Ollama round-trips in
+series: classification, then the responder. With SPECULATIVE_ROUTING=1 the
+responder for a guessed category (the local model's best guess, even below
+its confidence threshold) starts alongside the LLM classification. If the
+classification agrees the speculative reply is used; otherwise it is
+cancelled, which closes its upstream request, and the message is rerouted.
+
+Speculation is skipped when SPECULATION_MAX_INFLIGHT speculative replies are
+already running or the upstream client has no free slots, so guesses never
+queue ahead of real traffic.
+"""
+import asyncio
+import os
+import time
+from typing import List, Optional, Tuple
+
+import classifier
+import local_classifier
+import metrics
+import ollama_client
+from router import route
+
+ENABLED = os.getenv("SPECULATIVE_ROUTING", "0") == "1"
+MAX_INFLIGHT = int(os.getenv("SPECULATION_MAX_INFLIGHT", "4"))
+
+SPECULATIONS = metrics.Counter(
+    "bot_speculations_total", "Speculative responder starts by outcome.", ["outcome"]
+)
+SAVED_SECONDS = metrics.Histogram(
+    "bot_speculation_saved_seconds", "Latency saved by speculative replies that were kept."
+)
+WASTED_SECONDS = metrics.Histogram(
+    "bot_speculation_wasted_seconds", "Upstream time spent on speculative replies that were cancelled."
+)
+
+_inflight = 0
+
+
+async def _timed_route(message: str, category: str, history: List[dict]) -> Tuple[str, float]:
+    started = time.perf_counter()
+    reply = await route(message, {"category": category}, history)
+    return reply, time.perf_counter() - started
+
+
+def guess_category(message: str) -> Optional[str]:
+    return local_classifier.guess(message)
+
+
+async def classify_and_route(
+    message: str, history: List[dict] = (), previous: Optional[dict] = None
+) -> Tuple[dict, str]:
+    global _inflight
+
+    classification = classifier.classify_local(message, previous)
+    if classification is not None:
+        return classification, await route(message, classification, history)
+
+    guess = guess_category(message)
+    if guess is None or _inflight >= MAX_INFLIGHT or ollama_client.upstream_saturated():
+        SPECULATIONS.inc("skipped")
+        classification = await classifier.classify_with_llm(message)
+        return classification, await route(message, classification, history)
+
+    _inflight += 1
+    started = time.perf_counter()
+    speculative = asyncio.ensure_future(_timed_route(message, guess, history))
+    speculative.add_done_callback(lambda _: _release())
+    try:
+        classification = await classifier.classify_with_llm(message)
+    except BaseException:
+        speculative.cancel()
+        await asyncio.gather(speculative, return_exceptions=True)
+        raise
+    classified_after = time.perf_counter() - started
+
+    if classification["category"] == guess:
+        SPECULATIONS.inc("hit")
+        reply, responded_in = await speculative
+        # Serially this costs classify + respond; in parallel only the longer one.
+        SAVED_SECONDS.observe(min(classified_after, responded_in))
+        return classification, reply
+
+    SPECULATIONS.inc("miss")
+    speculative.cancel()
+    await asyncio.gather(speculative, return_exceptions=True)
+    WASTED_SECONDS.observe(classified_after)
+    return classification, await route(message, classification, history)
+
+
+def _release() -> None:
+    global _inflight
+    _inflight -= 1
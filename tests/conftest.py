@@ -0,0 +1,29 @@
+from contextlib import ExitStack
+
+import pytest
+
+import backends
+import cache
+from benchmarks.fake_ollama import FakeOllamaServer
+from tests.helpers import free_port
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """A fake Ollama on a free port, with the backend pool pointed at it and the cache off."""
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "off")
+    monkeypatch.setattr(cache, "_cache", None)
+    with FakeOllamaServer(free_port(), latency_ms=100) as server:
+        monkeypatch.setattr(backends, "_pool", backends.BackendPool([server.base_url]))
+        yield server
+
+
+@pytest.fixture
+def fake_ollamas(monkeypatch):
+    """Three fake Ollamas on free ports, all in the backend pool, with the cache off."""
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "off")
+    monkeypatch.setattr(cache, "_cache", None)
+    with ExitStack() as stack:
+        servers = [stack.enter_context(FakeOllamaServer(free_port(), latency_ms=100)) for _ in range(3)]
+        monkeypatch.setattr(backends, "_pool", backends.BackendPool([s.base_url for s in servers]))
+        yield servers
@@ -0,0 +1,21 @@
+import asyncio
+import socket
+
+import ollama_client
+
+
+def run(coro):
+    """asyncio.run, closing the shared Ollama client before the loop goes away."""
+    async def with_cleanup():
+        try:
+            return await coro
+        finally:
+            await ollama_client.aclose()
+
+    return asyncio.run(with_cleanup())
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
@@ -0,0 +1,102 @@
+import asyncio
+
+import backends
+import classifier
+import ollama_client
+from tests.helpers import run
+
+
+def test_health_check_does_not_queue_behind_busy_upstream(fake_ollama, monkeypatch):
+    monkeypatch.setattr(ollama_client, "MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(backends, "HEALTH_TIMEOUT_SECONDS", 0.05)
+    pool = backends.get_pool()
+
+    async def scenario():
+        chats = [asyncio.ensure_future(classifier.llm_classify(f"busy {i}")) for i in range(2)]
+        await asyncio.sleep(0.02)
+        assert ollama_client.upstream_saturated()
+        await pool.check()
+        await asyncio.gather(*chats)
+        await pool.stop()
+
+    ejections = sum(backends.EJECTIONS.values.values())
+    run(scenario())
+    assert pool.backends[0].healthy
+    assert pool.backends[0].models == {"mistral:latest"}
+    assert sum(backends.EJECTIONS.values.values()) == ejections
+
+
+def test_health_loop_survives_unexpected_errors(fake_ollama, monkeypatch):
+    monkeypatch.setattr(backends, "HEALTH_INTERVAL_SECONDS", 0.01)
+    pool = backends.get_pool()
+    rounds = []
+    real_check = pool.check
+
+    async def flaky_check():
+        rounds.append(1)
+        if len(rounds) == 1:
+            raise AttributeError("'list' object has no attribute 'get'")
+        await real_check()
+
+    monkeypatch.setattr(pool, "check", flaky_check)
+
+    async def scenario():
+        pool.start()
+        await asyncio.sleep(0.2)
+        assert not pool._task.done()
+        await pool.stop()
+
+    run(scenario())
+    assert len(rounds) > 1
+
+
+def classify_all(count: int, tag: str):
+    async def scenario():
+        return await asyncio.gather(*(classifier.llm_classify(f"{tag} question #{i}") for i in range(count)))
+
+    return run(scenario())
+
+
+def test_requests_spread_across_backends(fake_ollamas):
+    classify_all(30, "spread")
+    assert [s.calls for s in fake_ollamas] == [10, 10, 10]
+
+
+def test_stopped_backend_is_ejected_and_its_requests_retried(fake_ollamas, monkeypatch):
+    monkeypatch.setattr(ollama_client, "RETRY_BACKOFF_SECONDS", 0)
+    pool = backends.get_pool()
+    down, *up = fake_ollamas
+    down.__exit__(None, None, None)
+
+    results = classify_all(30, "failover")
+    assert all(isinstance(r, classifier.ClassifyResponse) for r in results)
+    assert [b.healthy for b in pool.backends] == [False, True, True]
+    assert sum(s.calls for s in up) == 30
+
+
+def test_model_specific_request_skips_backends_without_the_model(fake_ollamas):
+    fake_ollamas[2].app.state.models = ["llama3:latest"]
+    pool = backends.get_pool()
+
+    async def scenario():
+        await pool.check()
+        return await asyncio.gather(*(classifier.llm_classify(f"routed question #{i}") for i in range(30)))
+
+    run(scenario())
+    assert [s.calls for s in fake_ollamas] == [15, 15, 0]
+
+
+def test_retry_backoff_does_not_hold_an_upstream_slot(fake_ollama, monkeypatch):
+    monkeypatch.setattr(ollama_client, "MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(ollama_client, "RETRY_BACKOFF_SECONDS", 0.5)
+    monkeypatch.setattr(backends, "_pool", backends.BackendPool(["http://127.0.0.1:9"]))  # nothing listens here
+
+    async def scenario():
+        retrying = asyncio.ensure_future(classifier.llm_classify("anyone home?"))
+        await asyncio.sleep(0.1)
+        saturated = ollama_client.upstream_saturated()
+        retrying.cancel()
+        await asyncio.gather(retrying, return_exceptions=True)
+        return saturated
+
+    assert run(scenario()) is False
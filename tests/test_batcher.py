@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import cache
+import classifier
+from batcher import MicroBatcher
+from tests.helpers import run
+
+LABELS = {
+    "Can someone look over my plan?": "business",
+    "Who should I talk to first?": "other",
+    "Is this going to get us sued?": "legal",
+    "Where do I even start?": "business",
+}
+
+
+@pytest.fixture
+def labeled(fake_ollama, monkeypatch):
+    monkeypatch.setattr(classifier, "BATCH_MODE", "prompt")
+    monkeypatch.setattr(classifier, "BATCH_MAX_WAIT_MS", 50)
+    monkeypatch.setattr(classifier, "_batcher", None)
+    fake_ollama.app.state.labels.update(LABELS)
+    return fake_ollama
+
+
+def classify_all(texts):
+    async def scenario():
+        return await asyncio.gather(*(classifier.classify_with_llm(t) for t in texts))
+
+    return [r["category"] for r in run(scenario())]
+
+
+def test_batch_results_reach_their_own_callers(labeled):
+    assert classify_all(list(LABELS)) == list(LABELS.values())
+    assert labeled.calls == 1
+
+
+def test_unparseable_batch_falls_back_to_one_call_per_message(labeled):
+    labeled.app.state.malformed_batches = True
+    assert classify_all(list(LABELS)) == list(LABELS.values())
+    assert labeled.calls == 1 + len(LABELS)
+
+
+def recording(handler, batches):
+    async def record(items):
+        batches.append(list(items))
+        return await handler(items)
+
+    return record
+
+
+def test_waiter_cancelled_before_the_flush_is_dropped(labeled):
+    batches = []
+    batcher = MicroBatcher(recording(classifier.llm_classify_many, batches), max_items=8, max_wait_ms=50)
+    texts = list(LABELS)
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(batcher.submit(t)) for t in texts]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = run(scenario())
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert [r.category for i, r in enumerate(results) if i != 1] == [LABELS[t] for i, t in enumerate(texts) if i != 1]
+    assert batches == [[t for i, t in enumerate(texts) if i != 1]]
+
+
+def test_wrong_result_count_fails_every_waiter(labeled):
+    async def short(items):
+        return (await classifier.llm_classify_many(items))[:-1]
+
+    batcher = MicroBatcher(short, max_items=8, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(t) for t in LABELS), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher._pending == []
+
+
+def test_batches_with_the_same_words_do_not_share_a_cache_entry(fake_ollama, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "memory")
+    fake_ollama.app.state.labels.update({
+        "can we talk": "business", "tomorrow about it": "other",
+        "can we talk tomorrow": "other", "about it": "business",
+    })
+
+    async def scenario():
+        first = await classifier.llm_classify_many(["can we talk", "tomorrow about it"])
+        second = await classifier.llm_classify_many(["can we talk tomorrow", "about it"])
+        return first, second
+
+    first, second = run(scenario())
+    assert [r.category for r in first] == ["business", "other"]
+    assert [r.category for r in second] == ["other", "business"]
+    assert fake_ollama.calls == 2
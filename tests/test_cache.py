@@ -0,0 +1,96 @@
+import pytest
+
+import cache
+import ollama_client
+from tests.helpers import run
+
+
+class Clock:
+    """Stands in for the time module inside cache.py."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return cache.SQLiteCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+        return cache.MemoryCache(**kwargs)
+
+    return make
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    c = make_cache(max_entries=2)
+    c.set("a", {"n": 1})
+    clock.now += 1
+    c.set("b", {"n": 2})
+    clock.now += 1
+    assert c.get("a") == {"n": 1}
+    clock.now += 1
+    c.set("c", {"n": 3})
+
+    assert len(c) == 2
+    assert c.get("b") is None
+    assert c.get("a") == {"n": 1}
+    assert c.get("c") == {"n": 3}
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    c = make_cache(ttl=60)
+    c.set("a", {"n": 1})
+    clock.now += 59
+    assert c.get("a") == {"n": 1}
+    clock.now += 2
+    assert c.get("a") is None
+    assert (c.hits, c.misses) == (1, 1)
+
+
+def test_sqlite_entries_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache.SQLiteCache(path).set("a", {"n": 1})
+    assert cache.SQLiteCache(path).get("a") == {"n": 1}
+
+
+def chat_payload(text: str, **options) -> dict:
+    payload = {"model": "mistral", "messages": [{"role": "user", "content": text}], "stream": False}
+    if options:
+        payload["options"] = options
+    return payload
+
+
+@pytest.mark.parametrize("payload", [chat_payload("hi"), chat_payload("hi", temperature=0.7)])
+def test_nondeterministic_calls_have_no_key_and_count_as_bypasses(payload, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(cache, "_cache", None)
+    assert cache.key_for(payload) is None
+    assert run(cache.lookup(payload)) == (None, None)
+    assert cache.get_cache().bypasses == 1
+
+
+def test_normalized_variant_is_answered_from_the_cache(fake_ollama, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "memory")
+
+    async def scenario():
+        first = await ollama_client.chat(chat_payload("What does the Ciocca Center offer?", temperature=0))
+        second = await ollama_client.chat(chat_payload("what does the  ciocca center offer", temperature=0))
+        return first, second
+
+    first, second = run(scenario())
+    assert second == first
+    assert fake_ollama.calls == 1
+    assert cache.get_cache().hits == 1
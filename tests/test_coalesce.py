@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+import backends
+import classifier
+import main
+import ollama_client
+from tests.helpers import run
+
+
+def test_identical_burst_makes_one_call_per_stage(fake_ollama):
+    async def burst():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await asyncio.gather(
+                *(client.post("/bot", json={"message": "Could you take a look at this?"}) for _ in range(50))
+            )
+
+    responses = run(burst())
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.text for r in responses}) == 1
+    # One classification and one reply, shared by all 50 requests.
+    assert fake_ollama.calls == 2
+
+
+def test_upstream_error_reaches_every_waiter(fake_ollama, monkeypatch):
+    monkeypatch.setattr(backends, "_pool", backends.BackendPool(["http://127.0.0.1:9"]))  # nothing listens here
+    monkeypatch.setattr(ollama_client, "RETRY_BACKOFF_SECONDS", 0)
+
+    async def burst():
+        return await asyncio.gather(
+            *(classifier.llm_classify("hello?") for _ in range(10)), return_exceptions=True
+        )
+
+    results = run(burst())
+    assert all(isinstance(r, httpx.HTTPError) for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_the_others(fake_ollama):
+    async def burst():
+        tasks = [asyncio.ensure_future(classifier.llm_classify("anyone there?")) for _ in range(10)]
+        await asyncio.sleep(0.02)
+        tasks[0].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = run(burst())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(isinstance(r, classifier.ClassifyResponse) for r in results[1:])
+    assert fake_ollama.calls == 1
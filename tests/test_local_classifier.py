@@ -0,0 +1,17 @@
+import local_classifier
+
+
+def test_read_examples_skips_blank_lines(tmp_path):
+    path = tmp_path / "examples.jsonl"
+    path.write_text(
+        '{"text": "Can we file a patent?", "category": "legal"}\n'
+        "\n"
+        "   \n"
+        '{"text": "How should we price it?", "category": "business"}\n'
+        "\n",
+        encoding="utf-8",
+    )
+    assert local_classifier.read_examples(str(path)) == [
+        ("Can we file a patent?", "legal"),
+        ("How should we price it?", "business"),
+    ]
@@ -0,0 +1,28 @@
+import httpx
+
+import main
+import metrics
+from tests.helpers import run
+
+
+def stream_then_scrape():
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            await client.post("/bot/stream", json={"message": "How should we think about pricing for schools?"})
+            return await client.get("/metrics")
+
+    return run(go())
+
+
+def stage_count(stage: str) -> int:
+    row = metrics.STAGE_SECONDS.values.get((stage,))
+    return sum(row[:-1]) if row else 0
+
+
+def test_stream_records_route_and_responder_spans(fake_ollama):
+    before = {stage: stage_count(stage) for stage in ("route", "respond_business")}
+    response = stream_then_scrape()
+    assert response.status_code == 200
+    assert {stage: stage_count(stage) - n for stage, n in before.items()} == {"route": 1, "respond_business": 1}
+    assert 'bot_stage_seconds_count{stage="respond_business"}' in response.text
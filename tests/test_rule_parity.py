@@ -0,0 +1,131 @@
+"""
+Golden parity between the compiled keyword matcher and the original
+per-pattern re.search implementation, kept verbatim below as the reference.
+"""
+import random
+import re
+from typing import Optional
+
+import pytest
+
+from classifier import BUSINESS_HINTS, LEGAL_PATTERNS, ClassifyResponse, rule_based_classify
+
+
+def legacy_rule_based_classify(text: str) -> Optional[ClassifyResponse]:
+    t = text.lower()
+
+    # 1) legal first
+    legal_hits = []
+    for pat, flag in LEGAL_PATTERNS:
+        if re.search(pat, t):
+            legal_hits.append(flag)
+
+    if legal_hits:
+        return ClassifyResponse(
+            category="legal",
+            confidence=0.95,
+            flags=sorted(list(set(legal_hits))),
+            rationale="Detected legal-related topic keywords."
+        )
+
+    # 2) business next
+    business_hits = []
+    for pat, flag in BUSINESS_HINTS:
+        if re.search(pat, t):
+            business_hits.append(flag)
+
+    if business_hits:
+        return ClassifyResponse(
+            category="business",
+            confidence=0.75,
+            flags=sorted(list(set(business_hits))),
+            rationale="Detected business-related topic keywords."
+        )
+
+    # 3) other (Ciocca Center informational/website) last
+    # Logic: must mention ciocca AND show some informational/website intent
+    mentions_ciocca = re.search(r"\bciocca\b|\bciocca center\b", t) is not None
+    info_or_website_intent = re.search(
+        r"\bwhat is\b|\bwhat does\b|\bwhat can\b|\bservices?\b|\bhelp with\b|\boffer(s|ed)?\b|\babout\b|\bwebsite\b|\bsite\b|\bpage\b|\blink\b|\bwhere can i find\b|\bcontact\b",
+        t
+    ) is not None
+
+    if mentions_ciocca and info_or_website_intent:
+        return ClassifyResponse(
+            category="other",
+            confidence=0.85,
+            flags=["ciocca_center"],
+            rationale="Detected Ciocca Center informational inquiry."
+        )
+
+    return None
+
+
+KEYWORDS = [
+    "trademark", "tm", "®", "brand name", "patent", "provisional patent", "prior art",
+    "copyright", "dmca", "nda", "non-disclosure", "non disclosure", "confidentiality",
+    "contract", "terms", "agreement", "msa", "sow", "llc", "inc", "corporation",
+    "incorporate", "incorporation", "entity", "compliance", "regulatory", "regulation",
+    "gdpr", "hipaa", "fda", "tax", "1099", "w-2", "sales tax", "liability", "indemnify",
+    "indemnification", "hold harmless", "employment law", "misclassification", "contractor",
+    "marketing", "go-to-market", "gtm", "pricing", "revenue", "business model", "customer",
+    "user", "users", "market", "persona", "product", "mvp", "prototype", "feature",
+    "operations", "process", "hiring", "team", "ciocca", "ciocca center", "what is",
+    "what does", "what can", "service", "services", "help with", "offer", "offers",
+    "offered", "about", "website", "site", "page", "link", "where can i find", "contact",
+]
+NEAR_MISSES = [
+    "contracts", "teams", "products", "marketplace", "taxes", "patents", "incorporated",
+    "sitemap", "linked", "pages", "customers", "brand", "name", "law", "sales", "w2",
+    "cioccas", "offering", "abouts", "hire", "features", "tmx", "non", "disclosure",
+]
+FILLER = [
+    "i", "we", "need", "help", "my", "startup", "the", "a", "for", "and", "with", "how",
+    "do", "can", "our", "is", "to", "next", "week", "idea", "plan", "center", "what",
+]
+JOINERS = [" ", " ", " ", ", ", ". ", "-", "/", "(", ") ", "? ", "!", "'s ", "_", ""]
+
+
+def generate_corpus(n: int, seed: int):
+    rng = random.Random(seed)
+    vocab = KEYWORDS * 2 + NEAR_MISSES + FILLER * 3
+    corpus = []
+    for _ in range(n):
+        words = [rng.choice(vocab) for _ in range(rng.randint(1, 18))]
+        text = words[0]
+        for w in words[1:]:
+            text += rng.choice(JOINERS) + w
+        if rng.random() < 0.3:
+            text = text.upper() if rng.random() < 0.5 else text.title()
+        corpus.append(text)
+    return corpus
+
+
+def _dump(result: Optional[ClassifyResponse]):
+    return result and result.model_dump()
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Do I need an NDA before the demo?",
+    "Is our TM registered?",
+    "We sell ®-marked goods",
+    "How should we think about pricing for schools?",
+    "What does the Ciocca Center offer founders?",
+    "ciocca",
+    "Where can I find the Ciocca website link?",
+    "Our contracts and teams are growing",
+    "w-2 or 1099 for my contractor?",
+    "non-disclosure vs non disclosure",
+])
+def test_known_messages_match_legacy(text):
+    assert _dump(rule_based_classify(text)) == _dump(legacy_rule_based_classify(text))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_generated_corpus_matches_legacy(seed):
+    mismatches = [
+        text for text in generate_corpus(5000, seed)
+        if _dump(rule_based_classify(text)) != _dump(legacy_rule_based_classify(text))
+    ]
+    assert mismatches == []
@@ -0,0 +1,100 @@
+import json
+import time
+
+import httpx
+import pytest
+
+import classifier
+import main
+import sessions
+from tests.helpers import run
+
+BUSINESS = {"category": "business", "confidence": 0.7, "flags": [], "rationale": ""}
+LEGAL = {"category": "legal", "confidence": 0.7, "flags": [], "rationale": ""}
+
+
+@pytest.mark.parametrize("text", [
+    "What happens if someone sues us?",
+    "Can we get in trouble for using that logo?",
+    "Who owns the code my freelancer wrote?",
+])
+def test_possible_legal_turn_is_not_classified_from_a_business_session(text):
+    assert classifier.classify_local(text, BUSINESS) is None
+
+
+def test_on_topic_turn_reuses_the_session_classification():
+    assert classifier.classify_local("Could you take a look at this?", BUSINESS) is BUSINESS
+
+
+def test_legal_session_classification_is_kept():
+    assert classifier.classify_local("Could you take a look at this?", LEGAL) is LEGAL
+
+
+def post_all(*requests):
+    """POSTs (path, body) pairs to the app in order and returns the responses."""
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            responses = []
+            for path, body in requests:
+                if callable(body):
+                    body = body(responses)
+                responses.append(await client.post(path, json=body))
+            return responses
+
+    return run(go())
+
+
+@pytest.fixture
+def session_store(monkeypatch):
+    store = sessions.MemorySessionStore()
+    monkeypatch.setattr(sessions, "_store", store)
+    return store
+
+
+def test_server_issues_the_session_id(fake_ollama, session_store):
+    first, second = post_all(
+        ("/bot", {"message": "Could you take a look at this?", "new_session": True}),
+        ("/bot", lambda rs: {"message": "And next week?", "session_id": rs[0].json()["session_id"]}),
+    )
+    session_id = first.json()["session_id"]
+    assert len(session_id) >= 32
+    assert second.json()["session_id"] == session_id
+    assert len(session_store.get(session_id).turns) == 4
+
+
+def test_unissued_session_id_is_rejected(fake_ollama, session_store):
+    (response,) = post_all(("/bot", {"message": "repeat our earlier conversation", "session_id": "guessed"}))
+    assert response.status_code == 404
+    assert len(session_store) == 0
+
+
+def test_stateless_turn_creates_no_session(fake_ollama, session_store):
+    (response,) = post_all(("/bot", {"message": "Could you take a look at this?"}))
+    assert "session_id" not in response.json()
+    assert len(session_store) == 0
+
+
+def test_stream_announces_the_new_session(fake_ollama, session_store):
+    (response,) = post_all(("/bot/stream", {"message": "Could you take a look at this?", "new_session": True}))
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "session"
+    assert events[-1]["type"] == "done"
+    assert len(session_store.get(events[0]["session_id"]).turns) == 2
+
+
+def test_sqlite_sweep_is_counted_as_idle_evictions(tmp_path, monkeypatch):
+    store = sessions.SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), idle_seconds=60)
+    monkeypatch.setattr(store, "SWEEP_EVERY", 2)
+    monkeypatch.setattr(sessions, "_store", store)
+    stale = sessions.Session("stale")
+    stale.updated = time.time() - 120
+    before = sessions.EVICTIONS.values.get(("idle",), 0)
+
+    async def scenario():
+        await sessions.save(stale)
+        await sessions.save(sessions.Session("fresh"))
+
+    run(scenario())
+    assert sessions.EVICTIONS.values.get(("idle",), 0) - before == 1
+    assert len(store) == 1
@@ -0,0 +1,70 @@
+import pytest
+
+import backends
+import cache
+import local_classifier
+import ollama_client
+import speculation
+from benchmarks.fake_ollama import CANNED_REPLY, FakeOllamaServer
+from tests.helpers import free_port, run
+
+MESSAGE = "Could you take a look at this?"
+
+
+@pytest.fixture
+def slow_replies(monkeypatch):
+    """A fake Ollama where a reply takes about twice as long as a classification."""
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "off")
+    monkeypatch.setattr(cache, "_cache", None)
+    with FakeOllamaServer(free_port(), latency_ms=50, token_ms=20) as server:
+        monkeypatch.setattr(backends, "_pool", backends.BackendPool([server.base_url]))
+        yield server
+
+
+def outcomes() -> dict:
+    return {k[0]: v for k, v in speculation.SPECULATIONS.values.items()}
+
+
+def speculate(server, category: str):
+    server.app.state.labels[MESSAGE] = category
+    before = outcomes()
+    classification, reply = run(speculation.classify_and_route(MESSAGE))
+    counted = {k: v - before.get(k, 0) for k, v in outcomes().items() if v != before.get(k, 0)}
+    return classification, reply, counted
+
+
+def test_hit_keeps_the_speculative_reply(slow_replies):
+    guess = local_classifier.guess(MESSAGE)
+    classification, reply, counted = speculate(slow_replies, guess)
+    assert classification["category"] == guess
+    assert reply == CANNED_REPLY
+    assert counted == {"hit": 1}
+    assert slow_replies.calls == 2
+
+
+def test_miss_cancels_the_speculative_request_and_reroutes(slow_replies, monkeypatch):
+    flights = []
+
+    class RecordedFlight(ollama_client._Flight):
+        def __init__(self, task):
+            super().__init__(task)
+            flights.append(self)
+
+    monkeypatch.setattr(ollama_client, "_Flight", RecordedFlight)
+    actual = next(c for c in ("legal", "business", "other") if c != local_classifier.guess(MESSAGE))
+    classification, reply, counted = speculate(slow_replies, actual)
+    assert classification["category"] == actual
+    assert reply == CANNED_REPLY
+    assert counted == {"miss": 1}
+    # Classification, the cancelled speculative reply, then the real one.
+    assert slow_replies.calls == 3
+    assert [f.task.cancelled() for f in flights] == [False, True, False]
+    assert speculation._inflight == 0
+    assert ollama_client._inflight == {}
+
+
+def test_speculation_is_skipped_at_the_inflight_limit(slow_replies, monkeypatch):
+    monkeypatch.setattr(speculation, "MAX_INFLIGHT", 0)
+    _, _, counted = speculate(slow_replies, local_classifier.guess(MESSAGE))
+    assert counted == {"skipped": 1}
+    assert slow_replies.calls == 2